@@ -1,15 +1,26 @@
 import streamlit as st
 import pandas as pd
-import requests
-import io
+import json
 import time
-from bs4 import BeautifulSoup
+from datetime import datetime
+
+from stockscan import listing
+from stockscan.analysis import analyze_target, fundamentals_memory
+from stockscan.scan_engine import run_scan, retry_failed, DEFAULT_WORKERS, MAX_WORKERS
+from stockscan.fetcher import rate_limiter
+from stockscan.fundamentals_cache import default_cache, DEFAULT_TTL_DAYS
+from stockscan.valuation import evaluate, parse_multiples, reprice, DEFAULT_FILTERS
+from stockscan.render import build_result_table, style_result_table, SkipTableView
+from stockscan.metrics import collector, reason_summary
+from stockscan.checkpoint import ScanCheckpoint, list_scans
+from stockscan.market_snapshot import default_snapshot, SNAPSHOT_TTL
+from stockscan.history_store import append_scan, ticker_history, cross_section, scan_dates
 
 # 페이지 기본 설정
-st.set_page_config(page_title="주식탐색기 Ver 1.2", page_icon="📈", layout="wide")
+st.set_page_config(page_title="주식탐색기 Ver 1.3", page_icon="📈", layout="wide")
 
 # --- 헤더 ---
-st.title("주식탐색기 Ver 1.2")
+st.title("주식탐색기 Ver 1.3")
 with st.expander("📝 패치노트 (클릭하여 열기)"):
     st.markdown("""
     **✅ (26.04.15) Ver 1.0**
@@ -23,12 +34,26 @@ with st.expander("📝 패치노트 (클릭하여 열기)"):
     **✅ (26.04.17) Ver 1.2**
     - 탐색필터 및 과거 적정주가, 목표주가 도출 로직 추가
     - 탐색결과표 시각적 디자인 개편 및 UI 편의성 개선
+    
+    **✅ (26.10.18) Ver 1.3**
+    - 종목 분석 병렬 처리 및 호스트별 요청 속도 제한 적용 (전체 시장 탐색 시간 단축)
+    - 시장 종목 목록 병렬 로딩 및 HTTP 커넥션 재사용 (초기 로딩 시간 단축)
+    - 재무 데이터 로컬 캐시 추가 (유효기간/신규 결산 공시 시 자동 갱신, 고급 설정에서 강제 갱신 가능)
+    - 탐색 필터 및 PER 배수 변경 시 재탐색 없이 결과 즉시 재계산
+    - FnGuide 재무 데이터 추출 속도 개선 (필요한 표/행만 직접 파싱)
+    - 탐색 중 결과표 갱신 주기 조정 및 표 생성 속도 개선 (대량 종목 탐색 시 화면 끊김 완화)
+    - 탐색 성능 패널 추가 (처리 속도, 호스트별 응답 지연, 제외사유별 비율, JSON/CSV 다운로드)
+    - 탐색 진행 상황 자동 저장 (서버 재시작/접속 끊김 후에도 저장된 탐색을 불러와 이어서 탐색 가능)
+    - 시장 종목 목록을 서버 전체가 공유하고 백그라운드에서 자동 갱신 (접속 시 Data Loading 대기 제거)
+    - '시세만 갱신' 추가 (재무 데이터 재수집 없이 현재가만 다시 받아 괴리율/순위 즉시 재계산)
+    - 과거 탐색 기록 추가 (탐색 완료 시 종목별 적정주가/괴리율 자동 기록, 종목별 추이 및 날짜별 시장 단면 조회)
+    - 요청 실패 시 자동 재시도 및 요청 속도 자동 조절 (시간 초과/요청 제한/서버 오류로 누락된 종목은 탐색 마지막에 다시 수집)
     """)
 
 # --- 계산식 안내 ---
 st.markdown("### 🧮 산출 방식 안내")
 st.markdown("""
-- **적정주가**: `(연간 EPS * 10 or 15) + BPS - 부채 패널티`
+- **적정주가**: `(연간 EPS * 10 or 15) + BPS - 부채 패널티` (PER 배수는 탐색 필터에서 변경 가능)
   - 🔻 *부채 패널티 산식* (부채비율 기준)
     - **100% 이하**: `0` (패널티 없음)
     - **100% 초과**: `(총부채 - 총자본) / 상장주식수`
@@ -41,208 +66,86 @@ st.divider()
 
 # --- 상태 관리 초기화 ---
 if 'running' not in st.session_state: st.session_state.running = False
-if 'results' not in st.session_state: st.session_state.results = []
-if 'skipped_results' not in st.session_state: st.session_state.skipped_results = []
-if 'market_df' not in st.session_state: st.session_state.market_df = pd.DataFrame()
+if 'raw_records' not in st.session_state: st.session_state.raw_records = []
+if 'results' not in st.session_state: st.session_state.results = pd.DataFrame()
+if 'skipped_results' not in st.session_state: st.session_state.skipped_results = pd.DataFrame()
 if 'current_idx' not in st.session_state: st.session_state.current_idx = 0
 if 'target_stocks' not in st.session_state: st.session_state.target_stocks = []
+if 'skip_view' not in st.session_state: st.session_state.skip_view = SkipTableView()
+if 'scan_id' not in st.session_state: st.session_state.scan_id = None
+# 필터/PER 배수 위젯 기본값: 저장된 탐색을 불러오면 그 설정으로 바꾸므로 위젯의 value 대신 여기서 초기화
+for k, v in DEFAULT_FILTERS.items():
+    if f'filter_{k}' not in st.session_state: st.session_state[f'filter_{k}'] = v
+if 'per_multiples' not in st.session_state: st.session_state.per_multiples = "10, 15"
+# 불러온 탐색의 설정은 위젯이 만들어지기 전인 다음 실행 시작 시 반영
+if 'pending_settings' in st.session_state:
+    settings = st.session_state.pop('pending_settings')
+    for k, v in settings.get('filters', {}).items():
+        if k in DEFAULT_FILTERS: st.session_state[f'filter_{k}'] = bool(v)
+    if settings.get('multiples'): st.session_state.per_multiples = settings['multiples']
+
+# --- 시장(KOSPI/KOSDAQ) 종목 목록: 서버 전체 공유 스냅샷 (백그라운드에서 유효기간 전에 자동 갱신) ---
+snapshot = default_snapshot()
 
-# --- 시장(KOSPI/KOSDAQ) 정보 로드 함수 ---
-@st.cache_data(ttl=3600, show_spinner=False)
-def fetch_page_data(sosok, page):
-    url = f"https://finance.naver.com/sise/sise_market_sum.naver?sosok={sosok}&page={page}"
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    try:
-        res = requests.get(url, headers=headers, timeout=5)
-        soup = BeautifulSoup(res.text, 'html.parser')
-        table = soup.find('table', {'class': 'type_2'})
-        if not table: return [], False
-        
-        data = []
-        has_data = False
-        rows = table.find_all('tr')
-        for row in rows:
-            cols = row.find_all('td')
-            if len(cols) > 5:
-                a_tag = cols[1].find('a')
-                if a_tag:
-                    name = a_tag.text.strip()
-                    code = a_tag['href'].split('code=')[-1]
-                    close_txt = cols[2].text.strip().replace(',', '')
-                    stocks_txt = cols[7].text.strip().replace(',', '')
-                    if close_txt and stocks_txt:
-                        data.append({
-                            'Code': code, 'Name': name,
-                            'Close': float(close_txt),
-                            'Stocks': float(stocks_txt) * 1000
-                        })
-                        has_data = True
-        return data, has_data
-    except: return [], False
-
-if st.session_state.market_df.empty:
+if not snapshot.ready():
+    # 서버 시작 후 저장된 스냅샷이 없을 때만 최초 생성이 끝날 때까지 대기 (다른 접속자가 시작한 생성도 함께 기다림)
     loading_placeholder = st.empty()
     progress_bar = st.empty()
-    
-    data = []
     start_time = time.time()
-    
-    total_est = 55
-    current_idx = 0
-    for sosok, market_name in [(0, 'KOSPI'), (1, 'KOSDAQ')]:
-        marcap_rank = 1
-        for page in range(1, 45):
-            current_idx += 1
-            percent = min(current_idx / total_est, 1.0)
-            elapsed = time.time() - start_time
-            if current_idx > 1:
-                eta = elapsed / current_idx * (total_est - current_idx)
-            else:
-                eta = 0
-                
-            eta_val = max(0, int(eta))
-            if eta_val > 0:
-                loading_placeholder.markdown(f"### ⏳ Data Loading 중... (예상 남은 시간: {eta_val}초)")
-            else:
-                loading_placeholder.markdown("### ⏳ Data 최종 정리중...")
-            progress_bar.progress(percent)
-            
-            page_data, has_data = fetch_page_data(sosok, page)
-            if not has_data:
-                break
-            
-            for item in page_data:
-                item['Market'] = market_name
-                item['Marcap_Rank'] = marcap_rank
-                data.append(item)
-                marcap_rank += 1
-                
-    st.session_state.market_df = pd.DataFrame(data)
+    loading_placeholder.markdown("### ⏳ Data Loading 중...")
+    progress_bar.progress(0.0)
+    while not snapshot.ready():
+        done, total = snapshot.progress
+        elapsed = time.time() - start_time
+        eta_val = max(0, int(elapsed / done * (total - done))) if done > 0 else 0
+        if snapshot.last_error and not snapshot.refreshing():
+            loading_placeholder.markdown(f"### ⚠️ {snapshot.last_error} 잠시 후 다시 시도합니다...")
+        elif eta_val > 0:
+            loading_placeholder.markdown(f"### ⏳ Data Loading 중... (예상 남은 시간: {eta_val}초)")
+        elif total:
+            loading_placeholder.markdown("### ⏳ Data 최종 정리중...")
+        if total: progress_bar.progress(min(done / total, 1.0))
+        time.sleep(0.3)
     loading_placeholder.empty()
     progress_bar.empty()
-    st.rerun()
-
-# --- 스크래핑 및 계산 함수 ---
-def safe_float(val):
-    try:
-        if pd.isna(val): return None
-        v = str(val).replace(',', '').strip()
-        if not v or v == '-' or v == 'N/A': return None
-        return float(v)
-    except:
-        return None
-
-def analyze_stock(ticker, name, market, current_price, shares, marcap_rank, filters):
-    is_pref = not str(ticker).endswith('0') or name.endswith('우') or '우(' in name or '우B' in name
-    if is_pref and filters.get('pref', True):
-        return None, {"시장": market, "시총순위": marcap_rank, "종목명": name, "현재주가": current_price, "제외사유": "우선주 제외"}
-    
-    is_etf = any(k in name for k in ['KODEX', 'TIGER', 'KBSTAR', 'KINDEX', 'ARIRANG', 'KOSEF', 'HANARO', 'ACE', 'SOL', 'TIMEFOLIO', 'FOCUS', '마이티', 'TREX', '히어로즈', 'VITA']) or name.endswith('ETF')
-    if filters.get('etf', True) and is_etf:
-        return None, {"시장": market, "시총순위": marcap_rank, "종목명": name, "현재주가": current_price, "제외사유": "ETF 제외"}
-    
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    url_fin = f"https://comp.fnguide.com/SVO2/ASP/SVD_Finance.asp?pGB=1&gicode=A{ticker}"
-    url_main = f"https://comp.fnguide.com/SVO2/ASP/SVD_Main.asp?pGB=1&gicode=A{ticker}"
-    
-    t_equity = 0.0; t_debt = 0.0; c_liab = 0.0; a_eps = 0.0; past_eps = 0.0; q_eps = 0.0; bps = 0.0; past_bps = 0.0; op_profit = 0.0; is_future_eps = False
-    try:
-        res_fin = requests.get(url_fin, headers=headers, timeout=5)
-        res_fin.encoding = 'utf-8'
-        tables_fin = pd.read_html(io.StringIO(res_fin.text))
-        df_bs = tables_fin[2]
-        for _, row in df_bs.iterrows():
-            nm = str(row.iloc[0]).replace('\xa0', ' ').replace(' ', '').strip()
-            if nm in ['자본', '자본총계'] and t_equity == 0: 
-                for v in row.values[::-1]:
-                    vf = safe_float(v)
-                    if vf is not None: t_equity = vf * 100000000; break
-            if nm in ['부채', '부채총계'] and t_debt == 0: 
-                for v in row.values[::-1]:
-                    vf = safe_float(v)
-                    if vf is not None: t_debt = vf * 100000000; break
-            if '유동부채' in nm and '비유동' not in nm and c_liab == 0: 
-                for v in row.values[::-1]:
-                    vf = safe_float(v)
-                    if vf is not None: c_liab = vf * 100000000; break
-    except: return None, {"시장": market, "시총순위": marcap_rank, "종목명": name, "현재주가": current_price, "제외사유": "재무 데이터 로드 오류"}
-        
-    try:
-        res_main = requests.get(url_main, headers=headers, timeout=5)
-        res_main.encoding = 'utf-8'
-        tables_main = pd.read_html(io.StringIO(res_main.text))
-        for df in tables_main:
-            if df.columns.nlevels > 1:
-                col_types = [str(c[0]).strip() for c in df.columns]
-                col_names = [str(c[1]).strip() for c in df.columns]
-                for _, row in df.iterrows():
-                    nm = str(row.iloc[0]).replace('\xa0', ' ').replace(' ', '').strip()
-                    if 'EPS(원)' in nm:
-                        annuals = []
-                        for j in range(len(row)-1, 0, -1):
-                            val = safe_float(row.iloc[j])
-                            if val is not None:
-                                if 'Annual' in col_types[j]:
-                                    annuals.append((val, '(E)' in col_names[j]))
-                                elif 'NetQuarter' in col_types[j].replace(' ', '') and q_eps == 0:
-                                    q_eps = val
-                        if annuals:
-                            a_eps = annuals[0][0]
-                            is_future_eps = annuals[0][1]
-                            if len(annuals) > 1: past_eps = annuals[1][0]
-                            else: past_eps = a_eps
-                    elif 'BPS(원)' in nm and bps == 0:
-                        bps_annuals = []
-                        for j in range(len(row)-1, 0, -1):
-                            val = safe_float(row.iloc[j])
-                            if val is not None:
-                                if 'Annual' in col_types[j]:
-                                    bps_annuals.append(val)
-                                if bps == 0 and ('Annual' in col_types[j] or 'NetQuarter' in col_types[j].replace(' ', '')):
-                                    bps = val
-                        if bps_annuals:
-                            if len(bps_annuals) > 1: past_bps = bps_annuals[1]
-                            else: past_bps = bps_annuals[0]
-                    elif '영업이익' in nm and op_profit == 0:
-                        for j in range(len(row)-1, 0, -1):
-                            val = safe_float(row.iloc[j])
-                            if val is not None and 'Annual' in col_types[j]:
-                                op_profit = val
-                                break
-            if a_eps != 0 and q_eps != 0 and bps != 0: break
-    except: return None, {"시장": market, "시총순위": marcap_rank, "종목명": name, "현재주가": current_price, "제외사유": "재무 데이터 파싱 오류"}
-
-    if a_eps == 0 or bps == 0 or t_equity == 0: return None, {"시장": market, "시총순위": marcap_rank, "종목명": name, "현재주가": current_price, "제외사유": "필요 데이터 누락"}
-    if q_eps == 0: q_eps = a_eps / 4
-
-    d_ratio = (t_debt / t_equity) * 100
-    pnlty = ((t_debt - t_equity) / shares) if d_ratio > 100 else 0
-    p10 = (a_eps * 10) + bps - pnlty
-    p15 = (a_eps * 15) + bps - pnlty
-    t10 = (a_eps * 10) + bps - (c_liab / shares)
-    t15 = (a_eps * 15) + bps - (c_liab / shares)
-    
-    past_p10 = (past_eps * 10) + past_bps - pnlty
-    past_t10 = (past_eps * 10) + past_bps - (c_liab / shares)
-    past_t15 = (past_eps * 15) + past_bps - (c_liab / shares)
-    
-    reason = None
-    if a_eps <= 0 and filters.get('eps_neg', True): reason = "적자 기업 (EPS < 0)"
-    elif t10 <= 0 and filters.get('target_neg', True): reason = "목표주가 음수"
-    elif p10 <= 0 and filters.get('intrinsic_neg', True): reason = "적정주가 음수"
-    elif (a_eps * 10) < bps and filters.get('eps10_bps', True): reason = "EPS*10 < BPS"
-    elif op_profit < 0 and filters.get('op_neg', True): reason = "영업이익 적자"
-    
-    data = {"시장": market, "시총순위": marcap_rank, "종목명": name, "현재주가": current_price, "적정주가(10)": p10, "목표주가(10)": t10, "괴리율(10)": ((p10 - current_price) / current_price) * 100 if p10 > 0 else 0, "적정주가(15)": p15, "목표주가(15)": t15, "EPS": a_eps, "추정EPS여부": is_future_eps, "BPS": bps, "과거적정주가": past_p10, "과거목표주가(10)": past_t10, "과거목표주가(15)": past_t15, "과거EPS": past_eps, "과거BPS": past_bps, "부채비율(%)": d_ratio, "총부채_원": t_debt, "유동부채_원": c_liab, "총자본_원": t_equity, "상장주식수_원": shares}
-    if reason:
-        data["제외사유"] = reason
-        return (None, data)
-    return (data, None)
 
 # --- UI 설정 ---
-market_df = st.session_state.market_df
+RENDER_EVERY_N = 25      # 탐색 중 결과표 갱신 주기 (종목 수)
+RENDER_EVERY_SEC = 2.0   # 탐색 중 결과표 갱신 주기 (초)
+RENDER_MAX_SHARE = 0.2   # 탐색 시간 중 결과표 갱신에 쓰는 최대 비율 (행이 많아지면 갱신 간격 자동 확대)
+SAVED_SCAN_LIMIT = 30    # 저장된 탐색 목록에 표시할 최대 개수
+PRICE_REFRESH_MIN_AGE = 60  # 시세만 갱신: 종목 목록이 이보다 최근이면 다시 받지 않고 그대로 사용 (초)
+HISTORY_COLUMNS = {'scan_date': '탐색일', 'code': '종목코드', 'name': '종목명', 'market': '시장', 'close': '현재주가',
+                   'fair_price': '적정주가', 'target_price': '목표주가', 'gap_pct': '괴리율', 'per_multiple': 'PER 배수',
+                   'eps': 'EPS', 'bps': 'BPS', 'debt_ratio': '부채비율(%)', 'excluded_reason': '제외사유'}
+
+
+# 과거 탐색 기록 조회 (새 탐색이 기록되면 clear). 조회 시간은 실제로 파일을 읽었을 때의 값
+@st.cache_data(show_spinner=False)
+def load_history_dates():
+    return scan_dates()
+
+
+@st.cache_data(show_spinner=False)
+def load_ticker_history(code):
+    t0 = time.perf_counter(); df = ticker_history(code, columns=list(HISTORY_COLUMNS))
+    return df, time.perf_counter() - t0
+
+
+@st.cache_data(show_spinner=False)
+def load_cross_section(scan_date, market):
+    t0 = time.perf_counter(); df = cross_section(scan_date, market, columns=list(HISTORY_COLUMNS))
+    return df, time.perf_counter() - t0
+
+
+def clear_history_cache():
+    load_history_dates.clear(); load_ticker_history.clear(); load_cross_section.clear()
+
+
+market_df = snapshot.get()
 if not market_df.empty:
     st.markdown("### ⚙️ 탐색 모드 설정")
+    st.caption(f"종목 목록/현재가 기준: {datetime.fromtimestamp(snapshot.built_at):%m/%d %H:%M} (서버 공통, 약 {SNAPSHOT_TTL // 60}분마다 자동 갱신)")
     top_n = 50
     selected_custom = []
     col1, col2 = st.columns([1, 2])
@@ -258,137 +161,273 @@ if not market_df.empty:
 
     st.markdown("### 🔍 탐색 필터 (체크 시 분석에서 제외)")
     col_f1, col_f2, col_f3, col_f4 = st.columns(4)
-    with col_f1: st.checkbox("우선주", value=True, key="filter_pref")
-    with col_f2: st.checkbox("ETF 종목", value=True, key="filter_etf")
-    with col_f3: st.checkbox("적자기업 (EPS 음수)", value=True, key="filter_eps_neg")
-    with col_f4: st.checkbox("영업이익 적자", value=True, key="filter_op_neg")
+    with col_f1: st.checkbox("우선주", key="filter_pref")
+    with col_f2: st.checkbox("ETF 종목", key="filter_etf")
+    with col_f3: st.checkbox("적자기업 (EPS 음수)", key="filter_eps_neg")
+    with col_f4: st.checkbox("영업이익 적자", key="filter_op_neg")
     
     col_f5, col_f6, col_f7, _ = st.columns(4)
-    with col_f5: st.checkbox("목표주가 음수", value=True, key="filter_target_neg")
-    with col_f6: st.checkbox("적정주가 음수", value=True, key="filter_intrinsic_neg")
-    with col_f7: st.checkbox("EPS*10 < BPS", value=True, key="filter_eps10_bps")
+    with col_f5: st.checkbox("목표주가 음수", key="filter_target_neg")
+    with col_f6: st.checkbox("적정주가 음수", key="filter_intrinsic_neg")
+    with col_f7: st.checkbox("EPS*10 < BPS", key="filter_eps10_bps")
+    st.text_input("PER 배수 (쉼표로 구분)", key="per_multiples",
+                  help="첫 번째 배수로 괴리율 정렬 및 적정/목표주가 음수 필터를 적용합니다. 우선주/ETF 외 필터와 배수는 탐색 후에 바꿔도 즉시 재계산됩니다.")
+
+    with st.expander("⚙️ 고급 설정"):
+        st.number_input("동시 분석 종목 수", min_value=1, max_value=MAX_WORKERS, value=DEFAULT_WORKERS, key="scan_workers",
+                        help="FnGuide 요청은 작업 수와 무관하게 호스트별 초당 요청 한도 내에서만 전송됩니다.")
+        st.number_input("재무 데이터 캐시 유효기간 (일)", min_value=0, max_value=365, value=DEFAULT_TTL_DAYS, key="cache_ttl_days",
+                        help="유효기간이 지났거나 새 분기 실적 공시 기한이 지난 종목은 자동으로 다시 수집합니다.")
+        st.checkbox("재무 데이터 강제 갱신 (캐시 무시)", value=False, key="force_refresh")
+        st.caption(f"캐시된 종목 수: {default_cache().count():,}개 (서버 메모리 공유: {len(fundamentals_memory):,}개)")
+        st.checkbox("탐색 성능 패널 표시", value=False, key="show_metrics")
+
+    def open_saved_scan(scan_id):
+        # 저장된 탐색의 대상/레코드/필터·배수 설정을 세션으로 복원 (완료된 종목은 다시 요청하지 않음, 호출 후 st.rerun 필요)
+        meta, targets, records = ScanCheckpoint(scan_id).load()
+        st.session_state.pending_settings = meta.get('settings') or {}
+        st.session_state.target_stocks = targets; st.session_state.raw_records = records
+        st.session_state.current_idx = len(records); st.session_state.skip_view.reset(); st.session_state.scan_id = scan_id
+
+    with st.expander("🗂️ 저장된 탐색 불러오기"):
+        saved = list_scans(limit=SAVED_SCAN_LIMIT)
+        if not saved: st.caption("저장된 탐색이 없습니다. 탐색을 시작하면 종목별 진행 상황이 자동으로 저장됩니다.")
+        else:
+            saved_labels = {s['scan_id']: f"{datetime.fromtimestamp(s['created_at']):%m/%d %H:%M} · {s['label']} · {min(s['done'], s['targets']):,}/{s['targets']:,}종목"
+                            + (" (현재)" if s['scan_id'] == st.session_state.scan_id else "") for s in saved}
+            picked = st.selectbox("탐색 선택", list(saved_labels), format_func=saved_labels.get, key="saved_scan")
+            sc1, sc2, sc3, _ = st.columns([1, 1.4, 1, 1.6])
+            with sc1:
+                if st.button("📂 불러오기", disabled=st.session_state.running):
+                    open_saved_scan(picked); st.rerun()
+            with sc2:
+                if st.button("▶️ 불러와서 이어서 탐색", disabled=st.session_state.running):
+                    open_saved_scan(picked)
+                    st.session_state.running = st.session_state.current_idx < len(st.session_state.target_stocks)
+                    st.rerun()
+            with sc3:
+                if st.button("🗑️ 삭제", disabled=st.session_state.running or picked == st.session_state.scan_id):
+                    ScanCheckpoint(picked).delete(); st.rerun()
+
+    with st.expander("📈 과거 탐색 기록"):
+        history_dates = load_history_dates()
+        if not history_dates: st.caption("기록된 탐색이 없습니다. 탐색이 끝날 때마다 종목별 적정주가/괴리율이 자동으로 기록됩니다.")
+        else:
+            st.caption(f"기록된 탐색일 {len(history_dates):,}일 ({history_dates[-1]:%y.%m.%d} ~ {history_dates[0]:%y.%m.%d}), 괴리율/적정주가는 탐색 당시 첫 번째 PER 배수 기준")
+            tab_ticker, tab_date = st.tabs(["종목별 추이", "날짜별 시장 단면"])
+            with tab_ticker:
+                h_name = st.selectbox("종목", market_df['Name'].tolist(), index=None, placeholder="종목을 선택하세요", key="history_name")
+                if h_name:
+                    h_code = market_df.loc[market_df['Name'] == h_name, 'Code'].iloc[0]
+                    hist, took = load_ticker_history(h_code)
+                    st.caption(f"{len(hist):,}회 기록 · 조회 {took * 1000:,.0f}ms")
+                    if len(hist):
+                        st.line_chart(hist.set_index('scanned_at')[['close', 'fair_price', 'target_price']]
+                                      .rename(columns={'close': '현재주가', 'fair_price': '적정주가', 'target_price': '목표주가'}))
+                        st.dataframe(hist[list(HISTORY_COLUMNS)].rename(columns=HISTORY_COLUMNS).iloc[::-1], use_container_width=True, hide_index=True)
+            with tab_date:
+                hc1, hc2, _ = st.columns([1, 1, 2])
+                h_date = hc1.selectbox("탐색일", history_dates, format_func=lambda d: f"{d:%Y-%m-%d}", key="history_date")
+                h_market = hc2.selectbox("시장", ["전체", "KOSPI", "KOSDAQ"], key="history_market")
+                section, took = load_cross_section(h_date, None if h_market == "전체" else h_market)
+                st.caption(f"{len(section):,}종목 (제외 {section['excluded_reason'].notna().sum() if len(section) else 0:,}종목 포함) · 조회 {took * 1000:,.0f}ms")
+                if len(section):
+                    st.dataframe(section[list(HISTORY_COLUMNS)].rename(columns=HISTORY_COLUMNS), use_container_width=True, hide_index=True)
 
     st.divider()
     
     def get_targets():
-        if search_mode == "KOSPI 전체 탐색": return market_df[market_df['Market'] == 'KOSPI'].to_dict('records')
-        elif search_mode == "KOSDAQ 전체 탐색": return market_df[market_df['Market'] == 'KOSDAQ'].to_dict('records')
-        elif search_mode == "KOSPI 상위 N개 탐색": return market_df[market_df['Market'] == 'KOSPI'].head(top_n).to_dict('records')
-        elif search_mode == "KOSDAQ 상위 N개 탐색": return market_df[market_df['Market'] == 'KOSDAQ'].head(top_n).to_dict('records')
-        else: return market_df[market_df['Name'].isin(selected_custom)].to_dict('records')
+        if search_mode == "사용자 지정 탐색": return listing.select_targets(market_df, names=selected_custom)
+        market = "KOSPI" if "KOSPI" in search_mode else "KOSDAQ"
+        return listing.select_targets(market_df, market, top_n=top_n if "상위 N개" in search_mode else None)
 
-    btn_col1, btn_col2, btn_col3, _ = st.columns([1, 1.2, 1, 1.8])
+    def scan_label():
+        if search_mode == "사용자 지정 탐색": return f"사용자 지정 ({len(selected_custom)}종목)"
+        return search_mode.replace("N개", f"{top_n}개")
+
+    def start_saved_scan():
+        # 현재 세션의 탐색 대상/레코드로 새 저장 탐색 생성
+        settings = {'filters': {k[len('filter_'):]: v for k, v in st.session_state.items() if str(k).startswith('filter_')},
+                    'multiples': st.session_state.get('per_multiples', '10, 15')}
+        ckpt = ScanCheckpoint.create(st.session_state.target_stocks, label=scan_label(), settings=settings)
+        if st.session_state.raw_records:
+            with ckpt.writer() as w: w.write_many(st.session_state.raw_records)
+        st.session_state.scan_id = ckpt.scan_id
+
+    btn_col1, btn_col2, btn_col3, btn_col4, _ = st.columns([1, 1.2, 1, 1.1, 0.7])
     with btn_col1:
         if st.button("🚀 새로 탐색", disabled=st.session_state.running):
             st.session_state.target_stocks = get_targets()
-            st.session_state.results = []; st.session_state.skipped_results = []; st.session_state.current_idx = 0
-            if len(st.session_state.target_stocks) > 0: st.session_state.running = True
+            st.session_state.raw_records = []; st.session_state.current_idx = 0; st.session_state.skip_view.reset()
+            st.session_state.scan_id = None  # 대상이 없을 때 이전 저장 탐색에 이어 쓰지 않도록
+            if len(st.session_state.target_stocks) > 0:
+                start_saved_scan(); st.session_state.running = True
             st.rerun()
     with btn_col2:
         if st.button("▶️ 이어서/추가 탐색", disabled=st.session_state.running):
             new_targets = get_targets()
             
             existing_codes = set([s['Code'] for s in st.session_state.target_stocks])
-            for stock in new_targets:
-                if stock['Code'] not in existing_codes:
-                    st.session_state.target_stocks.append(stock)
+            added = [stock for stock in new_targets if stock['Code'] not in existing_codes]
+            st.session_state.target_stocks.extend(added)
             
+            # 저장된 탐색이 있으면 추가된 대상만 덧붙이고, 없으면 (이전 버전 세션 등) 지금까지의 진행 상황으로 새로 저장
+            scan_id = st.session_state.scan_id
+            if scan_id and ScanCheckpoint(scan_id).exists(): ScanCheckpoint(scan_id).add_targets(added)
+            elif st.session_state.target_stocks: start_saved_scan()
+
             if st.session_state.current_idx < len(st.session_state.target_stocks):
                 st.session_state.running = True
             st.rerun()
     with btn_col3:
         if st.button("⏹️ 일시정지", disabled=not st.session_state.running):
             st.session_state.running = False; st.rerun()
+    with btn_col4:
+        if st.button("💹 시세만 갱신", disabled=st.session_state.running or not st.session_state.raw_records,
+                     help="재무 데이터는 다시 받지 않고 Naver 시세 목록만 새로 받아 현재가 기준 괴리율과 순위를 다시 계산합니다."):
+            # 서버 공유 스냅샷을 갱신 (다른 접속자의 갱신이 진행 중이면 그 결과를 기다림) 후 현재가만 교체
+            with st.spinner("현재가 갱신 중..."):
+                refreshed = snapshot.refresh() if snapshot.age() > PRICE_REFRESH_MIN_AGE else True
+                latest = snapshot.get()
+                st.session_state.raw_records = reprice(pd.DataFrame(st.session_state.raw_records), latest).to_dict('records')
+                if st.session_state.target_stocks:
+                    st.session_state.target_stocks = reprice(pd.DataFrame(st.session_state.target_stocks), latest).to_dict('records')
+                # 저장된 탐색에도 반영: 불러올 때 종목별 마지막 기록을 쓰므로 갱신된 레코드/대상을 뒤에 덧붙임
+                ckpt = ScanCheckpoint(st.session_state.scan_id) if st.session_state.scan_id else None
+                if ckpt and ckpt.exists():
+                    with ckpt.writer() as w: w.write_many(st.session_state.raw_records)
+                    ckpt.add_targets(st.session_state.target_stocks)
+            # 제외 종목표는 새로 제외된 종목만 이어 붙이므로 현재가가 바뀌면 처음부터 다시 생성
+            st.session_state.skip_view.reset()
+            if not refreshed or snapshot.last_error:
+                # 갱신 실패/일부 페이지 누락: 기존 목록의 현재가로 계산했음을 재실행 후에 표시
+                st.session_state.price_refresh_warning = (f"⚠️ 현재가 갱신 실패: {snapshot.last_error or '알 수 없는 오류'} "
+                                                          f"({datetime.fromtimestamp(snapshot.built_at):%m/%d %H:%M} 기준 현재가로 계산했습니다)")
+            st.rerun()
+    if st.session_state.get('price_refresh_warning'): st.warning(st.session_state.pop('price_refresh_warning'))
 
     progress_container = st.empty(); status_text = st.empty()
+    result_area = st.empty(); skip_area = st.empty(); metrics_area = st.empty()
+
+    def current_filters():
+        return {
+            'pref': st.session_state.get('filter_pref', True),
+            'target_neg': st.session_state.get('filter_target_neg', True),
+            'intrinsic_neg': st.session_state.get('filter_intrinsic_neg', True),
+            'eps_neg': st.session_state.get('filter_eps_neg', True),
+            'eps10_bps': st.session_state.get('filter_eps10_bps', True),
+            'op_neg': st.session_state.get('filter_op_neg', True),
+            'etf': st.session_state.get('filter_etf', True)
+        }
 
+    @collector.timed('valuation')
+    def update_valuation():
+        # 수집된 원본 레코드 전체에 현재 필터/배수를 적용해 결과·제외 목록 재계산
+        multiples = parse_multiples(st.session_state.get('per_multiples', '10, 15'))
+        st.session_state.results, st.session_state.skipped_results = evaluate(pd.DataFrame(st.session_state.raw_records), current_filters(), multiples)
+        return multiples
+
+    @collector.timed('render')
     def render_result_table():
-        def fmt_curr(v): return f"{v/1e8:,.1f}"
-        if len(st.session_state.results) > 0:
-            st.markdown("### 🏆 탐색 결과")
-            st.caption("""ℹ️ **주가 산출 시 데이터 기준 및 색상 안내**
+        multiples = update_valuation()
+        results = st.session_state.results
+        with result_area.container():
+            if len(results) > 0:
+                st.markdown("### 🏆 탐색 결과")
+                st.caption("""ℹ️ **주가 산출 시 데이터 기준 및 색상 안내**
 - **기본/검정색**: 현재 존재하는 실제 실적으로 산출됨.
 - **<span style='color:#cda8ff; font-weight:bold;'>보라색 표기</span>**: 예측치(미래 추정치)로 산출됨. 
 - **EPS 적용 방식**: 1순위로 미래 예측치(E)를 우선 반영하며, 예측치가 없을 경우에만 가장 최근 발표된 실제 연간 EPS를 사용합니다.
 - **BPS 적용 방식**: 예측치 여부와 무관하게, 가장 최근 발표된 연간 또는 최신 분기(NetQuarter) 실적 중 가장 최신의 값을 현재 BPS로 반영합니다.""", unsafe_allow_html=True)
-            df = pd.DataFrame(st.session_state.results).sort_values("괴리율(10)", ascending=False).reset_index(drop=True)
-            res = pd.DataFrame()
-            res["시장"] = df.get("시장", "KOSPI"); res["순위"] = df.index+1; res["종목"] = df["종목명"]; res["시총순위"] = df["시총순위"]; res["현재주가(원)"] = df["현재주가"].apply(lambda x: f"{x:,.0f}")
-            res["적정주가(10, 원)"] = df["적정주가(10)"].apply(lambda x: f"{x:,.0f}"); res["목표주가(10, 원)"] = df["목표주가(10)"].apply(lambda x: f"{x:,.0f}")
-            res["괴리율(10, %)"] = df["괴리율(10)"].apply(lambda x: f"{x:.2f}"); res["적정주가(15, 원)"] = df["적정주가(15)"].apply(lambda x: f"{x:,.0f}"); res["목표주가(15, 원)"] = df["목표주가(15)"].apply(lambda x: f"{x:,.0f}")
-            res["EPS(원)"] = df["EPS"].apply(lambda x: f"{x:,.0f}"); res["BPS(원)"] = df["BPS"].apply(lambda x: f"{x:,.0f}")
-            res["과거 적정주가"] = df["과거적정주가"].apply(lambda x: f"{x:,.0f}"); res["과거목표주가(10)"] = df["과거목표주가(10)"].apply(lambda x: f"{x:,.0f}"); res["과거목표주가(15)"] = df["과거목표주가(15)"].apply(lambda x: f"{x:,.0f}")
-            res["과거 EPS(원)"] = df.get("과거EPS", 0).apply(lambda x: f"{x:,.0f}"); res["과거 BPS(원)"] = df.get("과거BPS", 0).apply(lambda x: f"{x:,.0f}")
-            res["부채비율(%)"] = df["부채비율(%)"].apply(lambda x: f"{x:.2f}")
-            res["총부채(억원)"] = df["총부채_원"].apply(fmt_curr); res["유동부채(억원)"] = df["유동부채_원"].apply(fmt_curr); res["총자본(억원)"] = df["총자본_원"].apply(fmt_curr); res["주식수(만개)"] = df["상장주식수_원"].apply(lambda x: f"{x/1e4:,.0f}")
-
-            # 가로 횡스크롤 시 좌측에 고정되도록 인덱스 설정
-            res = res.set_index(["시장", "순위", "종목"])
-
-            def highlight_eps_cols(row):
-                styles = [''] * len(row)
-                original_idx = int(row.name[1]) - 1  # 다중 인덱스의 '순위' 값으로 원래 인덱스 추적
-                
-                # 행 짝수/홀수 구분 (스트라이프 배경으로 주식별 구분)
-                is_even = (original_idx % 2 == 0)
-                base_bg = 'background-color: rgba(128, 128, 128, 0.05); ' if is_even else 'background-color: transparent; '
-                
-                # 데이터 그룹별 배경색 (현재 데이터=옅은 파랑톤, 과거 데이터=옅은 오렌지/갈색톤)
-                group1_bg = 'background-color: rgba(60, 130, 250, 0.12); ' if is_even else 'background-color: rgba(60, 130, 250, 0.05); '
-                group2_bg = 'background-color: rgba(250, 130, 60, 0.12); ' if is_even else 'background-color: rgba(250, 130, 60, 0.05); '
-                
-                group1_cols = ['적정주가(10, 원)', '목표주가(10, 원)', '괴리율(10, %)', '적정주가(15, 원)', '목표주가(15, 원)', 'EPS(원)', 'BPS(원)']
-                group2_cols = ['과거 적정주가', '과거목표주가(10)', '과거목표주가(15)', '과거 EPS(원)', '과거 BPS(원)']
-                
-                text_color = ''
-                if df.get("추정EPS여부", pd.Series([False]*len(df))).iloc[original_idx]:
-                    text_color = 'color: #cda8ff; font-weight: bold; '
-                
-                for i, col_name in enumerate(row.index):
-                    cell_style = base_bg
-                    
-                    if col_name in group1_cols:
-                        cell_style = group1_bg
-                        if col_name == '적정주가(10, 원)': cell_style += 'border-left: 2px solid rgba(128,128,128,0.2); '
-                        if col_name == 'BPS(원)': cell_style += 'border-right: 2px solid rgba(128,128,128,0.2); '
-                    elif col_name in group2_cols:
-                        cell_style = group2_bg
-                        if col_name == '과거 적정주가': cell_style += 'border-left: 2px solid rgba(128,128,128,0.2); '
-                        if col_name == '과거 BPS(원)': cell_style += 'border-right: 2px solid rgba(128,128,128,0.2); '
-                    
-                    if col_name in ['적정주가(10, 원)', '목표주가(10, 원)', '적정주가(15, 원)', '목표주가(15, 원)', 'EPS(원)'] and text_color != '':
-                        cell_style += text_color
-                        
-                    styles[i] = cell_style
-                    
-                return styles
-            
-            styled_res = res.style.apply(highlight_eps_cols, axis=1)
-            st.dataframe(styled_res, use_container_width=True) # 고정된 인덱스를 보여주기 위해 hide_index=True 제거
-        if len(st.session_state.skipped_results) > 0:
-            with st.expander("🚫 분석 제외 종목", expanded=True):
-                dfS = pd.DataFrame(st.session_state.skipped_results).sort_values("시총순위")
-                skip = pd.DataFrame()
-                skip["시장"] = dfS.get("시장", "KOSPI"); skip["종목"] = dfS["종목명"]; skip["시총순위"] = dfS["시총순위"]; skip["사유"] = dfS.get("제외사유", "데이터 오류"); skip["현재주가(원)"] = dfS["현재주가"].apply(lambda x: f"{float(x):,.0f}")
-                st.dataframe(skip, use_container_width=True, hide_index=True)
+                res, styles = build_result_table(results, multiples)
+                st.dataframe(style_result_table(res, styles), use_container_width=True) # 고정된 인덱스를 보여주기 위해 hide_index=True 제거
+        with skip_area.container():
+            skipped = st.session_state.skipped_results
+            if len(skipped) > 0:
+                with st.expander("🚫 분석 제외 종목", expanded=True):
+                    skip_key = (tuple(sorted(current_filters().items())), multiples)
+                    st.dataframe(st.session_state.skip_view.update(skipped, skip_key), use_container_width=True, hide_index=True)
+
+    def render_metrics_panel(live=False):
+        # live: 탐색 중 주기적 갱신 (같은 실행에서 여러 번 그리므로 다운로드/초기화 버튼은 탐색이 끝난 뒤에만 표시)
+        processed = len(st.session_state.raw_records)
+        skipped = st.session_state.skipped_results
+        reasons = reason_summary(skipped, processed)
+        with metrics_area.container():
+            with st.expander("📊 탐색 성능", expanded=True):
+                st.caption(f"최근 요청/단계 {collector.window:,}건 기준, 서버 전체(모든 접속자) 합산")
+                m1, m2, m3 = st.columns(3)
+                m1.metric("처리 속도 (종목/분)", f"{collector.throughput():,.1f}")
+                m2.metric("처리 종목 수", f"{processed:,}")
+                m3.metric("제외 비율", f"{len(skipped) / processed:.1%}" if processed else "-")
+                st.markdown("**호스트별 응답 지연**")
+                st.dataframe(collector.host_summary(), use_container_width=True, hide_index=True)
+                st.markdown("**호스트별 요청 속도 (초당, 요청 제한 또는 오류가 잦으면 자동 감속 / 정상 시 자동 가속)**")
+                st.dataframe(rate_limiter.rates_frame(), use_container_width=True, hide_index=True)
+                st.markdown("**단계별 소요 시간**")
+                st.dataframe(collector.stage_summary(), use_container_width=True, hide_index=True)
+                st.markdown("**제외사유별 비율**")
+                st.dataframe(reasons, use_container_width=True, hide_index=True)
+                if live: return
+                d1, d2, d3, _ = st.columns([1, 1, 1, 2])
+                d1.download_button("JSON 다운로드", json.dumps(collector.snapshot(reasons), ensure_ascii=False, indent=2),
+                                   file_name="scan_metrics.json", mime="application/json")
+                d2.download_button("CSV 다운로드", collector.summary_frame(reasons).to_csv(index=False).encode('utf-8-sig'),
+                                   file_name="scan_metrics.csv", mime="text/csv")
+                if d3.button("측정값 초기화"): collector.reset(); st.rerun()
 
     if st.session_state.running:
         total = len(st.session_state.target_stocks)
-        prog = progress_container.progress(0.0)
-        for i, stock in enumerate(st.session_state.target_stocks[st.session_state.current_idx:], start=st.session_state.current_idx):
-            prog.progress((i)/total); status_text.markdown(f"**진행중:** {i}/{total} ({stock['Name']})")
-            filters = {
-                'pref': st.session_state.get('filter_pref', True),
-                'target_neg': st.session_state.get('filter_target_neg', True),
-                'intrinsic_neg': st.session_state.get('filter_intrinsic_neg', True),
-                'eps_neg': st.session_state.get('filter_eps_neg', True),
-                'eps10_bps': st.session_state.get('filter_eps10_bps', True),
-                'op_neg': st.session_state.get('filter_op_neg', True),
-                'etf': st.session_state.get('filter_etf', True)
-            }
-            res, extra = analyze_stock(stock['Code'], stock['Name'], stock.get('Market', 'KOSPI'), float(stock['Close']), float(stock['Stocks']), stock['Marcap_Rank'], filters)
-            if res: st.session_state.results.append(res)
-            else: st.session_state.skipped_results.append(extra)
-            render_result_table(); st.session_state.current_idx = i + 1; time.sleep(0.3)
-        st.session_state.running = False; progress_container.empty(); status_text.success("완료!"); st.rerun()
-    else: render_result_table()
+        prog = progress_container.progress(st.session_state.current_idx / total)
+        # 작업 스레드에서는 session_state 에 접근할 수 없으므로 필터는 탐색 시작 시점에 확정
+        filters = current_filters()
+        cache = default_cache()
+        ttl_days = st.session_state.get('cache_ttl_days', DEFAULT_TTL_DAYS)
+        force_refresh = st.session_state.get('force_refresh', False)
+        def analyze(stock):
+            return analyze_target(stock, filters, cache=cache, ttl_days=ttl_days, force_refresh=force_refresh)
+
+        start = st.session_state.current_idx
+        workers = st.session_state.get('scan_workers', DEFAULT_WORKERS)
+        last_render_idx, last_render_t, render_cost = start, time.time(), 0.0
+        # 종목 하나가 끝날 때마다 저장된 탐색에 이어 씀 (일시정지/재실행으로 중단되어도 기록된 종목까지는 보존)
+        checkpoint = ScanCheckpoint(st.session_state.scan_id).writer() if st.session_state.scan_id else None
+        try:
+            for i, stock, record in run_scan(st.session_state.target_stocks[start:], analyze, max_workers=workers, start=start):
+                if checkpoint: checkpoint.write(record)
+                prog.progress((i + 1)/total); status_text.markdown(f"**진행중:** {i + 1}/{total} ({stock['Name']})")
+                st.session_state.raw_records.append(record); st.session_state.current_idx = i + 1
+                # 결과표는 N종목 또는 T초마다만 다시 그림 (매 종목 전체 재생성 시 O(n²))
+                elapsed = time.time() - last_render_t
+                if (i + 1 - last_render_idx >= RENDER_EVERY_N or elapsed >= RENDER_EVERY_SEC) and elapsed * RENDER_MAX_SHARE >= render_cost:
+                    t0 = time.time(); render_result_table()
+                    if st.session_state.get('show_metrics', False): render_metrics_panel(live=True)
+                    last_render_idx, last_render_t, render_cost = i + 1, time.time(), time.time() - t0
+            # 재시도 대기열: 요청 재시도 후에도 일시적 오류/점검 페이지로 누락된 종목은 전체를 한 번 돈 뒤 다시 수집
+            records = st.session_state.raw_records
+            queued = sum(1 for r in records if r.get('retryable'))
+            if queued:
+                prog.progress(0.0)
+                for n, (i, record) in enumerate(retry_failed(records, analyze, max_workers=workers)):
+                    if checkpoint: checkpoint.write(record)
+                    records[i] = record
+                    prog.progress((n + 1) / queued); status_text.markdown(f"**누락 종목 재시도:** {n + 1}/{queued} ({record['Name']})")
+                # 다시 받은 종목은 제외사유가 바뀌거나 결과표로 옮겨질 수 있으므로 제외 종목표를 처음부터 다시 생성
+                st.session_state.skip_view.reset()
+                recovered = queued - sum(1 for r in records if r.get('retryable'))
+                st.toast(f"누락 종목 {queued:,}개 중 {recovered:,}개를 다시 수집했습니다.")
+        finally:
+            if checkpoint: checkpoint.close()
+        st.session_state.running = False; progress_container.empty(); status_text.success("완료!")
+        # 완료된 탐색의 종목별 평가 결과를 과거 기록에 추가 (같은 탐색을 이어서 다시 완료하면 그 탐색 기록만 교체)
+        if st.session_state.scan_id:
+            multiples = update_valuation()
+            try:
+                with collector.timer('history.append'):
+                    append_scan(st.session_state.results, st.session_state.skipped_results, multiples, st.session_state.scan_id)
+                clear_history_cache()
+            except OSError: pass  # 기록 실패해도 탐색 결과는 그대로 표시
+        st.rerun()
+    else:
+        render_result_table()
+        if st.session_state.get('show_metrics', False): render_metrics_panel()
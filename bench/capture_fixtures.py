@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+from stockscan import analysis, fetcher
+from stockscan.fnguide_parser import parse_finance, parse_main
+
+from .stub_server import FIXTURES_DIR, FNGUIDE_PAGES, RECORDED_DIR
+
+# --- 실제 FnGuide 페이지 저장 (실제 사이트 접속) ---
+# 유형별 (정상/우선주/ETF/적자/결측/추정치) 종목 하나씩 SVD_Finance / SVD_Main 응답을 그대로 bench/fixtures/recorded 에 저장
+# 저장된 유형은 스텁 서버/벤치마크가 합성 페이지 대신 사용하고, check_parser 도 함께 확인
+# 기본 종목은 합성 픽스처 manifest.json 에서 유형별 첫 번째 종목 (--code 유형=종목코드 로 변경)
+#
+#   python -m bench.capture_fixtures
+#   python -m bench.capture_fixtures --code loss=051910 --code missing=034730
+
+
+def default_codes():
+    with open(os.path.join(FIXTURES_DIR, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    codes = {}
+    for code, kind in manifest['stocks'].items(): codes.setdefault(kind, code)
+    return {kind: codes[kind] for kind in manifest['kinds'] if kind in codes}
+
+
+def parse_summary(fin_html, main_html):
+    # 저장한 페이지가 의도한 유형인지 눈으로 확인하기 위한 요약
+    try: fin = "자본 {:,.0f} / 부채 {:,.0f} / 유동부채 {:,.0f}".format(*parse_finance(fin_html))
+    except (ValueError, IndexError) as e: fin = f"재무상태표 없음 ({type(e).__name__})"
+    a_eps, _, q_eps, bps, _, _, is_future_eps, period = parse_main(main_html)
+    return f"{fin} | EPS {a_eps:,.0f}{'(E)' if is_future_eps else ''} / 분기 EPS {q_eps:,.0f} / BPS {bps:,.0f} / 결산 {period}"
+
+
+def capture(codes, out_dir=RECORDED_DIR):
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, 'manifest.json')
+    recorded = {'kinds': {}}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f: recorded = json.load(f)
+    for kind, code in codes.items():
+        pages = {}
+        for page in FNGUIDE_PAGES:
+            res = fetcher.get(f"{analysis.FNGUIDE_URL}/SVO2/ASP/{page}.asp?pGB=1&gicode=A{code}")
+            res.encoding = 'utf-8'
+            pages[page] = res.text
+        for page, text in pages.items():
+            with open(os.path.join(out_dir, f'{page}_{kind}.html'), 'w', encoding='utf-8') as f: f.write(text)
+        recorded['kinds'][kind] = {'code': code, 'captured_at': datetime.now().isoformat(timespec='seconds')}
+        print(f"{kind:9s} {code}  {parse_summary(pages['SVD_Finance'], pages['SVD_Main'])}")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(recorded, ensure_ascii=False, indent=1) + '\n')
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog='python -m bench.capture_fixtures', description="유형별 실제 FnGuide 페이지 저장")
+    p.add_argument('--code', action='append', default=[], metavar='유형=종목코드', help="유형별 종목 지정 (여러 번 사용 가능)")
+    p.add_argument('--only', nargs='+', help="저장할 유형만 지정")
+    p.add_argument('--out', default=RECORDED_DIR, help="저장 폴더")
+    args = p.parse_args(argv)
+
+    codes = default_codes()
+    for item in args.code:
+        kind, _, code = item.partition('=')
+        if kind not in codes or len(code) != 6: p.error(f"--code 형식 오류: {item} (유형: {', '.join(codes)})")
+        codes[kind] = code
+    if args.only: codes = {k: v for k, v in codes.items() if k in args.only}
+    try: capture(codes, args.out)
+    except fetcher.FetchError as e:
+        print(f"페이지 저장 실패: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
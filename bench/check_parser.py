@@ -0,0 +1,141 @@
+import glob
+import io
+import os
+import sys
+
+import pandas as pd
+
+from stockscan.fnguide_parser import parse_finance, parse_main
+
+from .stub_server import FIXTURES_DIR, RECORDED_DIR
+
+# --- FnGuide 파서 회귀 확인 ---
+# stockscan.fnguide_parser (lxml 직접 파싱) 결과를 이전 방식 (pd.read_html + safe_float, Ver 1.2 의 analyze_stock) 과
+# 페이지별로 비교. 다르면 종료코드 1
+# 기본 대상: 합성 픽스처 (bench/fixtures), 마크업 확인용 합성 페이지 (bench/fixtures/parser: 숨김 표/행, rowspan/colspan,
+# <br>, 툴팁, tfoot, 결측값 문자열), capture_fixtures 로 저장한 실제 페이지 (bench/fixtures/recorded)
+#
+#   python -m bench.check_parser
+#   python -m bench.check_parser saved_pages/*.html   (직접 저장한 FnGuide 페이지도 확인 가능)
+
+EOK = 100000000
+PAGE_DIRS = (FIXTURES_DIR, os.path.join(FIXTURES_DIR, 'parser'), RECORDED_DIR)
+MAIN_FIELDS = ('a_eps', 'past_eps', 'q_eps', 'bps', 'past_bps', 'op_profit', 'is_future_eps', 'period')
+
+
+def safe_float(val):
+    try:
+        if pd.isna(val): return None
+        v = str(val).replace(',', '').strip()
+        if not v or v == '-' or v == 'N/A': return None
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def _row_name(row):
+    return str(row.iloc[0]).replace('\xa0', ' ').replace(' ', '').strip()
+
+
+def ref_finance(page_html):
+    t_equity = t_debt = c_liab = 0.0
+    df_bs = pd.read_html(io.StringIO(page_html))[2]
+    for _, row in df_bs.iterrows():
+        nm = _row_name(row)
+        if nm in ['자본', '자본총계'] and t_equity == 0:
+            for v in row.values[::-1]:
+                vf = safe_float(v)
+                if vf is not None: t_equity = vf * EOK; break
+        if nm in ['부채', '부채총계'] and t_debt == 0:
+            for v in row.values[::-1]:
+                vf = safe_float(v)
+                if vf is not None: t_debt = vf * EOK; break
+        if '유동부채' in nm and '비유동' not in nm and c_liab == 0:
+            for v in row.values[::-1]:
+                vf = safe_float(v)
+                if vf is not None: c_liab = vf * EOK; break
+    return t_equity, t_debt, c_liab
+
+
+def ref_main(page_html):
+    # period: 실적 EPS 가 있는 가장 최근 Net Quarter 열 (추정 분기 (E) 제외) 의 YYYY/MM
+    a_eps = past_eps = q_eps = bps = past_bps = op_profit = 0.0
+    is_future_eps = False; period = None
+    for df in pd.read_html(io.StringIO(page_html)):
+        if df.columns.nlevels > 1:
+            col_types = [str(c[0]).strip() for c in df.columns]
+            col_names = [str(c[1]).strip() for c in df.columns]
+            for _, row in df.iterrows():
+                nm = _row_name(row)
+                if 'EPS(원)' in nm:
+                    annuals = []
+                    for j in range(len(row) - 1, 0, -1):
+                        val = safe_float(row.iloc[j])
+                        if val is not None:
+                            if 'Annual' in col_types[j]:
+                                annuals.append((val, '(E)' in col_names[j]))
+                            elif 'NetQuarter' in col_types[j].replace(' ', ''):
+                                if q_eps == 0: q_eps = val
+                                if period is None and '(E)' not in col_names[j]: period = col_names[j][:7]
+                    if annuals:
+                        a_eps, is_future_eps = annuals[0]
+                        past_eps = annuals[1][0] if len(annuals) > 1 else a_eps
+                elif 'BPS(원)' in nm and bps == 0:
+                    bps_annuals = []
+                    for j in range(len(row) - 1, 0, -1):
+                        val = safe_float(row.iloc[j])
+                        if val is not None:
+                            if 'Annual' in col_types[j]: bps_annuals.append(val)
+                            if bps == 0 and ('Annual' in col_types[j] or 'NetQuarter' in col_types[j].replace(' ', '')): bps = val
+                    if bps_annuals:
+                        past_bps = bps_annuals[1] if len(bps_annuals) > 1 else bps_annuals[0]
+                elif '영업이익' in nm and op_profit == 0:
+                    for j in range(len(row) - 1, 0, -1):
+                        val = safe_float(row.iloc[j])
+                        if val is not None and 'Annual' in col_types[j]:
+                            op_profit = val
+                            break
+        if a_eps != 0 and q_eps != 0 and bps != 0: break
+    return a_eps, past_eps, q_eps, bps, past_bps, op_profit, is_future_eps, period
+
+
+def _outcome(fn, page_html):
+    # (결과, 예외 여부) → 둘 다 예외면 같은 것으로 봄 (analysis 에서는 모두 파싱 오류 또는 점검 페이지로 처리)
+    try: return fn(page_html), False
+    except Exception: return None, True
+
+
+def check_page(path):
+    # → 다른 항목 목록 (빈 목록이면 일치)
+    with open(path, encoding='utf-8') as f: page_html = f.read()
+    name = os.path.basename(path)
+    if name.startswith('SVD_Finance'): pairs, fields = (parse_finance, ref_finance), ('t_equity', 't_debt', 'c_liab')
+    elif name.startswith('SVD_Main'): pairs, fields = (parse_main, ref_main), MAIN_FIELDS
+    else: return None
+    (new, new_err), (ref, ref_err) = (_outcome(fn, page_html) for fn in pairs)
+    if new_err or ref_err:
+        return [] if new_err and ref_err else [f"예외: 새 파서={new_err}, 이전 방식={ref_err}"]
+    return [f"{f}: {a!r} != {b!r}" for f, a, b in zip(fields, new, ref) if a != b]
+
+
+def default_paths():
+    return [p for d in PAGE_DIRS for p in sorted(glob.glob(os.path.join(d, 'SVD_*.html')))]
+
+
+def main(argv=None):
+    paths = (argv if argv is not None else sys.argv[1:]) or default_paths()
+    if not argv and not glob.glob(os.path.join(RECORDED_DIR, 'SVD_*.html')):
+        print("실제 FnGuide 페이지 없음: 합성 페이지만 확인 (python -m bench.capture_fixtures 로 저장)")
+    failed = 0
+    for path in paths:
+        diffs = check_page(path)
+        if diffs is None: continue
+        print(f"{'OK  ' if not diffs else 'DIFF'} {os.path.relpath(path, FIXTURES_DIR) if path.startswith(FIXTURES_DIR) else path}")
+        for d in diffs: print(f"     {d}")
+        failed += bool(diffs)
+    print(f"{len(paths) - failed}/{len(paths)} 일치")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
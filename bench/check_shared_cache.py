@@ -0,0 +1,147 @@
+import sys
+import threading
+import time
+
+from stockscan.shared_cache import SingleFlight, TTLCache
+
+# --- 접속자 간 공유 캐시 확인 (SingleFlight / TTLCache) ---
+# 같은 키 동시 요청 합치기, 선행 호출 예외 전달, 키 정리, 호출측 유효기간(max_age), LRU 제거, 유효기간 만료
+# 항목별 OK/FAIL 출력, 하나라도 실패하면 종료코드 1
+#
+#   python -m bench.check_shared_cache
+
+CALLERS = 8
+HOLD = 0.2  # 선행 호출이 끝나기 전에 나머지 호출이 모두 도착하도록 잡아 두는 시간 (초)
+
+
+def _concurrent(flight, key, fn, n=CALLERS):
+    # n개 스레드가 동시에 flight.do(key, fn) → 스레드별 ('ok', (결과, 공유 여부)) 또는 ('error', 예외)
+    out = [None] * n
+    barrier = threading.Barrier(n)
+
+    def run(i):
+        barrier.wait()
+        try: out[i] = ('ok', flight.do(key, fn))
+        except Exception as e: out[i] = ('error', e)
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    return out
+
+
+def check_same_key():
+    flight, calls = SingleFlight(), []
+
+    def fn():
+        calls.append(1); time.sleep(HOLD)
+        return object()
+    out = _concurrent(flight, 'A005930', fn)
+    results = {id(r[1][0]) for r in out if r[0] == 'ok'}
+    leaders = sum(1 for r in out if r[0] == 'ok' and not r[1][1])
+    problems = []
+    if len(calls) != 1: problems.append(f"fn 실행 {len(calls)}회 (1회여야 함)")
+    if len(results) != 1 or any(r[0] != 'ok' for r in out): problems.append("호출마다 결과가 다름")
+    if leaders != 1: problems.append(f"공유 여부 False 인 호출 {leaders}개 (1개여야 함)")
+    return problems
+
+
+def check_leader_error():
+    flight = SingleFlight()
+    error = ValueError("fnguide down")
+
+    def fn():
+        time.sleep(HOLD)
+        raise error
+    out = _concurrent(flight, 'A000660', fn)
+    problems = []
+    if not all(r[0] == 'error' and r[1] is error for r in out): problems.append("기다리던 호출 중 같은 예외를 받지 못한 호출이 있음")
+    if flight.in_flight(): problems.append(f"예외 후 진행 중 키 {flight.in_flight()}개 남음")
+    return problems
+
+
+def check_key_cleanup():
+    flight, calls = SingleFlight(), []
+
+    def fn():
+        calls.append(1)
+        return len(calls)
+    first, second = flight.do('k', fn), flight.do('k', fn)
+    problems = []
+    if flight.in_flight(): problems.append(f"완료 후 진행 중 키 {flight.in_flight()}개 남음")
+    if (first, second) != ((1, False), (2, False)): problems.append(f"완료된 키를 다시 요청하면 새로 실행해야 함: {first}, {second}")
+    return problems
+
+
+def check_distinct_keys():
+    # 다른 키끼리는 기다리지 않음 (동시에 실행)
+    flight, running, peak, lock = SingleFlight(), [0], [0], threading.Lock()
+    keys = iter(range(CALLERS))
+
+    def fn():
+        with lock: running[0] += 1; peak[0] = max(peak[0], running[0])
+        time.sleep(HOLD)
+        with lock: running[0] -= 1
+
+    def run():
+        flight.do(next(keys), fn)
+    threads = [threading.Thread(target=run) for _ in range(CALLERS)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    return [] if peak[0] == CALLERS else [f"다른 키 동시 실행 최대 {peak[0]}개 ({CALLERS}개여야 함)"]
+
+
+def check_max_age():
+    cache = TTLCache(ttl=60)
+    cache.put('k', 1)
+    time.sleep(0.1)
+    problems = []
+    if cache.get('k', max_age=0.05) is not None: problems.append("max_age 가 지난 항목을 반환함")
+    if cache.get('k') != 1: problems.append("max_age 로 만료된 항목이 캐시 유효기간(ttl) 안인데 삭제됨")
+    if cache.get('k', max_age=3600) != 1: problems.append("max_age 가 ttl 보다 길 때 항목을 반환하지 않음")
+    return problems
+
+
+def check_expiry():
+    cache = TTLCache(ttl=0.05)
+    cache.put('k', 1)
+    time.sleep(0.1)
+    problems = []
+    if cache.get('k') is not None: problems.append("ttl 이 지난 항목을 반환함")
+    if len(cache): problems.append("ttl 이 지난 항목을 조회 후에도 삭제하지 않음")
+    return problems
+
+
+def check_lru():
+    cache = TTLCache(maxsize=3, ttl=60)
+    for k in 'abc': cache.put(k, k)
+    cache.get('a')       # a 를 최근 사용으로
+    cache.put('d', 'd')  # → 가장 오래 안 쓴 b 제거
+    cache.put('c', 'c')  # 덮어쓰기는 크기를 늘리지 않음
+    kept = [k for k in 'abcd' if cache.get(k) is not None]
+    return [] if kept == ['a', 'c', 'd'] and len(cache) == 3 else [f"남은 항목 {kept} (['a', 'c', 'd'] 여야 함)"]
+
+
+CHECKS = {
+    'SingleFlight 같은 키 동시 호출': check_same_key,
+    'SingleFlight 선행 호출 예외 전달': check_leader_error,
+    'SingleFlight 키 정리': check_key_cleanup,
+    'SingleFlight 다른 키 동시 실행': check_distinct_keys,
+    'TTLCache max_age < ttl': check_max_age,
+    'TTLCache 유효기간 만료': check_expiry,
+    'TTLCache LRU 제거': check_lru,
+}
+
+
+def main():
+    failed = 0
+    for name, check in CHECKS.items():
+        problems = check()
+        print(f"{'OK  ' if not problems else 'FAIL'} {name}")
+        for p in problems: print(f"     {p}")
+        failed += bool(problems)
+    print(f"{len(CHECKS) - failed}/{len(CHECKS)} 통과")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from stockscan import analysis, fetcher, listing
+from stockscan.analysis import analyze_stock, analyze_target
+from stockscan.fnguide_parser import parse_finance, parse_main
+from stockscan.render import build_result_table, style_result_table
+from stockscan.scan_engine import run_scan
+from stockscan.valuation import DEFAULT_FILTERS, DEFAULT_MULTIPLES, evaluate
+
+from .stub_server import DEFAULT_PAGES, Fixtures, StubServer
+
+# --- 오프라인 성능 측정 (실제 사이트 접속 없음) ---
+# 스텁 서버를 띄우고 listing/analysis 의 기본 URL 을 스텁으로 바꾼 뒤 단계별 소요 시간을 JSON 으로 출력
+#
+#   python -m bench.run_bench --out bench_result.json
+#   python -m bench.run_bench --latency 0.05 --concurrency 1 4 8 16 --scan-size 500
+
+NO_FILTERS = {k: False for k in DEFAULT_FILTERS}  # 우선주/ETF 도 FnGuide 까지 요청하도록
+
+
+def summarize(samples):
+    return {'min': min(samples), 'median': statistics.median(samples), 'mean': statistics.fmean(samples), 'n': len(samples)}
+
+
+def timed(fn, repeat, setup=None):
+    # setup: 매 반복 전에 호출 (측정 시간에 포함 안 함)
+    samples = []
+    for _ in range(repeat):
+        if setup: setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def bench_listing(stub, repeat):
+    # 시장 전체 종목 목록 로딩 (첫 페이지 → 나머지 페이지 동시 요청)
+    rows = []
+    samples = timed(lambda: rows.append(len(listing.load_market_listing())), repeat)
+    return {'seconds': summarize(samples), 'rows': rows[-1], 'pages': stub.pages * len(listing.MARKETS)}
+
+
+def bench_parse(fixtures, stub, repeat):
+    # 유형별 종목 1개 처리 시간: 파서만 (CPU) / analyze_stock 전체 (스텁 HTTP 포함, 캐시 없음)
+    out = {}
+    rows = {}  # 유형별 첫 번째 픽스처 행
+    for row, code in enumerate(fixtures.codes): rows.setdefault(fixtures.kind_by_code[code], row)
+    for kind in fixtures.kinds:
+        fin = fixtures.pages[('SVD_Finance', kind)].decode('utf-8')
+        main = fixtures.pages[('SVD_Main', kind)].decode('utf-8')
+
+        def parse():
+            try: parse_finance(fin)
+            except (ValueError, IndexError): pass  # ETF 페이지는 재무상태표가 없음 (analysis 에서는 로드 오류 처리)
+            parse_main(main)
+        parse_ms = [s * 1000 for s in timed(parse, repeat)]
+        entry = {'source': fixtures.sources[kind], 'parse_ms': summarize(parse_ms)}
+        if kind in rows:
+            code, name = fixtures.synthetic_code(0, 1, rows[kind]), fixtures.names[rows[kind]]
+            records = []
+            # 서버 공유 메모리 캐시를 매번 비워야 스텁 요청 + 파싱까지 측정됨
+            analyze_ms = [s * 1000 for s in timed(lambda: records.append(analyze_stock(code, name, 'KOSPI', 10000.0, 1e6, 1, NO_FILTERS)), repeat,
+                                                  setup=analysis.fundamentals_memory.clear)]
+            entry['analyze_stock_ms'] = summarize(analyze_ms)
+            entry['error'] = records[-1]['error']
+        out[kind] = entry
+    return out
+
+
+def bench_scan(stub, targets, levels):
+    # 종목 N개 전체 탐색 (캐시 없음) 의 초당 처리 종목 수를 동시 작업 수별로 측정
+    out = []
+    for workers in levels:
+        analysis.fundamentals_memory.clear()  # 이전 동시 작업 수에서 받은 재무 데이터를 재사용하지 않도록
+        stub.reset_stats()
+        t0 = time.perf_counter()
+        errors = sum(1 for _, _, rec in run_scan(targets, lambda s: analyze_target(s, DEFAULT_FILTERS), max_workers=workers) if rec['error'])
+        elapsed = time.perf_counter() - t0
+        out.append({'workers': workers, 'stocks': len(targets), 'seconds': elapsed, 'stocks_per_sec': len(targets) / elapsed,
+                    'errors': errors, 'requests': stub.stats['requests']})
+    return out
+
+
+def synthetic_raw(fixtures, n):
+    # 재무 데이터가 있는 픽스처 유형을 순환시켜 n개 종목의 원본 레코드 생성 (렌더링 측정용, 필터 끄면 전부 결과표에 표시)
+    parsed = {}
+    for kind in fixtures.kinds:
+        try: fin = parse_finance(fixtures.pages[('SVD_Finance', kind)].decode('utf-8'))
+        except (ValueError, IndexError): continue
+        main = parse_main(fixtures.pages[('SVD_Main', kind)].decode('utf-8'))
+        if not (main[0] and main[3]): continue
+        parsed[kind] = dict(zip(('t_equity', 't_debt', 'c_liab'), fin), **dict(zip(('a_eps', 'past_eps', 'q_eps', 'bps', 'past_bps', 'op_profit', 'is_future_eps', 'period'), main)))
+    kinds = list(parsed)
+    rng = np.random.default_rng(0)
+    rows = []
+    for i in range(n):
+        kind = kinds[i % len(kinds)]
+        rows.append({'Code': f"{i:05d}0", 'Name': f"종목{i}", 'Market': 'KOSPI' if i % 2 else 'KOSDAQ', 'Marcap_Rank': i + 1,
+                     'Close': float(rng.integers(1000, 300000)), 'Stocks': float(rng.integers(10**6, 10**9)),
+                     'is_pref': False, 'is_etf': False, 'fetched': True, 'error': None, **parsed[kind]})
+    return pd.DataFrame(rows)
+
+
+def bench_render(fixtures, sizes, repeat):
+    # 결과표 갱신 1회 비용: 일괄 평가 → 표시용 표/스타일 생성 → Styler 스타일 계산 (st.dataframe 이 하는 작업)
+    out = []
+    for n in sizes:
+        raw = synthetic_raw(fixtures, n)
+        results, _ = evaluate(raw, NO_FILTERS, DEFAULT_MULTIPLES)
+        res, styles = build_result_table(results, DEFAULT_MULTIPLES)
+        out.append({
+            'rows': n, 'result_rows': len(results),
+            'evaluate_ms': summarize([s * 1000 for s in timed(lambda: evaluate(raw, NO_FILTERS, DEFAULT_MULTIPLES), repeat)]),
+            'build_ms': summarize([s * 1000 for s in timed(lambda: build_result_table(results, DEFAULT_MULTIPLES), repeat)]),
+            'style_ms': summarize([s * 1000 for s in timed(lambda: style_result_table(res, styles)._compute(), repeat)]),
+        })
+    return out
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError): return None
+
+
+def build_parser():
+    p = argparse.ArgumentParser(prog='python -m bench.run_bench', description="주식탐색기 오프라인 벤치마크 (결과는 JSON)")
+    p.add_argument('--out', help="결과 JSON 파일 (없으면 표준출력)")
+    p.add_argument('--only', nargs='+', choices=['listing', 'parse', 'scan', 'render'], help="지정한 항목만 측정")
+    p.add_argument('--repeat', type=int, default=3, help="항목별 반복 횟수")
+    p.add_argument('--pages', type=int, default=DEFAULT_PAGES, help="스텁 시장별 시세 페이지 수 (페이지당 50종목)")
+    p.add_argument('--latency', type=float, default=0.03, help="스텁 응답 지연 (초)")
+    p.add_argument('--jitter', type=float, default=0.0, help="스텁 추가 지연 상한 (초)")
+    p.add_argument('--error-rate', type=float, default=0.0, help="스텁 오류 응답 비율 (0~1)")
+    p.add_argument('--error-status', type=int, default=503)
+    p.add_argument('--rate', type=float, default=0.0, help="스텁 호스트 초당 요청 한도 (0 = 제한 없음)")
+    p.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8, 16], help="탐색 동시 작업 수 목록")
+    p.add_argument('--scan-size', type=int, default=200, help="탐색 측정 종목 수")
+    p.add_argument('--render-rows', type=int, nargs='+', default=[100, 1000, 2500], help="렌더링 측정 행 수 목록")
+    p.add_argument('--seed', type=int, default=0)
+    return p
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    only = set(args.only or ['listing', 'parse', 'scan', 'render'])
+    fixtures = Fixtures()
+    report = {'meta': {
+        'timestamp': datetime.now().isoformat(timespec='seconds'), 'revision': git_revision(),
+        'python': platform.python_version(), 'pandas': pd.__version__, 'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+        'params': {k: v for k, v in vars(args).items() if k not in ('out', 'only')},
+    }}
+
+    with StubServer(pages=args.pages, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                    error_status=args.error_status, seed=args.seed, fixtures=fixtures) as stub:
+        listing.NAVER_URL = analysis.FNGUIDE_URL = stub.base_url
+        fetcher.rate_limiter.rates[stub.host] = args.rate
+
+        if 'listing' in only:
+            report['listing'] = bench_listing(stub, args.repeat)
+        if 'parse' in only:
+            latency, stub.latency = stub.latency, 0.0  # 종목당 처리 시간은 네트워크 지연 없이
+            report['parse'] = bench_parse(fixtures, stub, args.repeat * 10)
+            stub.latency = latency
+        if 'scan' in only:
+            market_df = listing.load_market_listing()
+            targets = market_df.head(args.scan_size).to_dict('records')
+            report['scan'] = bench_scan(stub, targets, args.concurrency)
+    if 'render' in only:
+        report['render'] = bench_render(fixtures, args.render_rows, args.repeat)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f: f.write(text + '\n')
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
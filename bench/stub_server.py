@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# --- Naver 시가총액 / FnGuide 재무 페이지 로컬 스텁 서버 ---
+# bench/fixtures 의 HTML 을 그대로 돌려주며, 지연/오류/타임아웃을 확률적으로 주입할 수 있음
+# bench/fixtures 의 페이지는 손으로 만든 합성 페이지 (manifest.json 의 source), 실제 FnGuide 페이지를
+# capture_fixtures 로 bench/fixtures/recorded 에 저장해 두면 해당 유형은 그 페이지로 응답
+# 시세 페이지는 고정 50행 픽스처를 (시장, 페이지) 마다 종목코드만 바꿔서 재사용하고,
+# FnGuide 요청은 종목코드에 담긴 픽스처 행 번호로 유형(정상/우선주/ETF/적자/결측/추정치)을 찾아 해당 페이지를 반환
+#
+#   python -m bench.stub_server --port 8765 --latency 0.05 --error-rate 0.02
+#   STOCKSCAN_NAVER_URL=http://127.0.0.1:8765 STOCKSCAN_FNGUIDE_URL=http://127.0.0.1:8765 STOCKSCAN_CACHE_DIR=/tmp/stub-cache streamlit run 1test.py
+#   (스텁 종목코드가 실제 재무 데이터 캐시에 섞이지 않도록 캐시 경로를 따로 지정)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+RECORDED_DIR = os.path.join(FIXTURES_DIR, 'recorded')
+FNGUIDE_PAGES = ('SVD_Finance', 'SVD_Main')
+DEFAULT_PAGES = 25  # 시장별 페이지 수 (페이지당 50종목 → 기본 2,500종목)
+
+_RE_CODE = re.compile(r'code=(\d{6})')
+_RE_LAST_PAGE = re.compile(r'(class="pgRR"><a href="[^"]*page=)\d+')
+
+
+class Fixtures:
+    def __init__(self, fixtures_dir=FIXTURES_DIR, recorded_dir=RECORDED_DIR):
+        self.dir = fixtures_dir
+        with open(os.path.join(fixtures_dir, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.kinds = manifest['kinds']
+        self.kind_by_code = manifest['stocks']
+        self.listing = self._read(manifest['listing'])
+        self.codes = _RE_CODE.findall(self.listing)[::2]  # 행마다 종목/토론실 링크 2개
+        self.names = re.findall(r'class="tltle">([^<]+)<', self.listing)
+        self.pages = {(page, kind): self._read(f'{page}_{kind}.html').encode('utf-8')
+                      for page in FNGUIDE_PAGES for kind in self.kinds}
+        self.sources = {kind: manifest.get('source', 'synthetic') for kind in self.kinds}
+        if recorded_dir: self._load_recorded(recorded_dir)
+
+    def _load_recorded(self, recorded_dir):
+        # capture_fixtures 로 저장한 실제 페이지가 있는 유형은 합성 페이지 대신 사용
+        path = os.path.join(recorded_dir, 'manifest.json')
+        if not os.path.exists(path): return
+        with open(path, encoding='utf-8') as f:
+            recorded = json.load(f)
+        for kind, info in recorded['kinds'].items():
+            if kind not in self.kinds: continue
+            for page in FNGUIDE_PAGES:
+                with open(os.path.join(recorded_dir, f'{page}_{kind}.html'), encoding='utf-8') as f:
+                    self.pages[(page, kind)] = f.read().encode('utf-8')
+            self.sources[kind] = f"recorded {info['code']} ({info['captured_at']})"
+
+    def _read(self, name):
+        with open(os.path.join(self.dir, name), encoding='utf-8') as f:
+            return f.read()
+
+    def synthetic_code(self, sosok, page, row):
+        # 시장(1) + 페이지(2) + 행(2) + 원래 코드 끝자리(1): 끝자리를 유지해야 우선주 판정이 픽스처와 같음
+        return f"{sosok}{page:02d}{row:02d}{self.codes[row][-1]}"
+
+    def kind_of(self, code):
+        try: return self.kind_by_code[self.codes[int(code[3:5])]]
+        except (ValueError, IndexError): return 'etf'  # 알 수 없는 코드는 재무 표가 없는 페이지
+
+
+class StubServer:
+    def __init__(self, host='127.0.0.1', port=0, pages=DEFAULT_PAGES, latency=0.0, jitter=0.0,
+                 error_rate=0.0, error_status=503, timeout_rate=0.0, timeout_delay=6.0, seed=None, fixtures=None):
+        self.fixtures = fixtures or Fixtures()
+        self.pages = pages
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.timeout_rate = timeout_rate
+        self.timeout_delay = timeout_delay  # fetcher.get 기본 timeout(5초)보다 길게
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'timeouts': 0, 'bytes': 0}
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def host(self):
+        return self.httpd.server_address[0]
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='stub-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_stats(self):
+        with self._lock:
+            for k in self.stats: self.stats[k] = 0
+
+    def _count(self, **inc):
+        with self._lock:
+            for k, v in inc.items(): self.stats[k] += v
+
+    def _fault(self):
+        # 요청마다 (지연 초, 오류 상태코드 또는 None) 결정
+        with self._lock:
+            r = self._rng.random()
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if r < self.timeout_rate: return self.timeout_delay, None
+        if r < self.timeout_rate + self.error_rate: return delay, self.error_status
+        return delay, None
+
+    @lru_cache(maxsize=None)
+    def listing_page(self, sosok, page):
+        fx = self.fixtures
+        if page > self.pages:
+            # 마지막 페이지 이후: 종목 행 없는 표
+            body = re.sub(r'<tr onMouseOver.*?</tr>', '', fx.listing, flags=re.S)
+        else:
+            rows = iter(range(len(fx.codes)))
+            codes = {}
+
+            def repl(m):
+                code = m.group(1)
+                if code not in codes: codes[code] = fx.synthetic_code(sosok, page, next(rows))
+                return f"code={codes[code]}"
+            body = _RE_CODE.sub(repl, fx.listing)
+        body = _RE_LAST_PAGE.sub(lambda m: m.group(1) + str(self.pages), body)
+        return body.encode('utf-8')
+
+    def route(self, path, query):
+        if path == '/sise/sise_market_sum.naver':
+            sosok = int(query.get('sosok', ['0'])[0])
+            page = int(query.get('page', ['1'])[0])
+            return self.listing_page(sosok, page)
+        m = re.fullmatch(r'/SVO2/ASP/(SVD_Finance|SVD_Main)\.asp', path)
+        if m:
+            code = query.get('gicode', ['A'])[0][1:]
+            return self.fixtures.pages[(m.group(1), self.fixtures.kind_of(code))]
+        return None
+
+
+def _make_handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive (fetcher 의 공유 세션 커넥션 재사용)
+        disable_nagle_algorithm = True  # 헤더/본문 분할 전송 시 delayed ACK 로 인한 40ms 지연 방지
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            delay, status = server._fault()
+            if delay: time.sleep(delay)
+            body = None if status else server.route(url.path, parse_qs(url.query))
+            if status or body is None:
+                status = status or 404
+                body = f"stub error {status}".encode()
+                server._count(requests=1, errors=1)
+            else:
+                status = 200
+                server._count(requests=1, bytes=len(body), timeouts=int(delay >= server.timeout_delay))
+            try:
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError): pass  # 타임아웃으로 클라이언트가 먼저 끊은 경우
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog='python -m bench.stub_server', description="Naver/FnGuide 로컬 스텁 서버")
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8765)
+    p.add_argument('--pages', type=int, default=DEFAULT_PAGES, help="시장별 시세 페이지 수 (페이지당 50종목)")
+    p.add_argument('--latency', type=float, default=0.0, help="응답 지연 (초)")
+    p.add_argument('--jitter', type=float, default=0.0, help="추가 지연 상한 (초, 균등분포)")
+    p.add_argument('--error-rate', type=float, default=0.0, help="오류 응답 비율 (0~1)")
+    p.add_argument('--error-status', type=int, default=503, help="오류 응답 상태코드 (예: 429, 500, 503)")
+    p.add_argument('--timeout-rate', type=float, default=0.0, help="타임아웃 유발 비율 (0~1)")
+    p.add_argument('--seed', type=int, default=None)
+    args = p.parse_args(argv)
+
+    server = StubServer(args.host, args.port, pages=args.pages, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                        error_status=args.error_status, timeout_rate=args.timeout_rate, seed=args.seed)
+    print(f"스텁 서버 실행 중: {server.base_url}  (STOCKSCAN_NAVER_URL / STOCKSCAN_FNGUIDE_URL 로 지정)")
+    try: server.httpd.serve_forever()
+    except KeyboardInterrupt: pass
+    finally: server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
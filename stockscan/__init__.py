@@ -0,0 +1 @@
+# 주식탐색기 스크래핑/탐색 코어 (Streamlit 비의존)
@@ -0,0 +1,104 @@
+import os
+import time
+
+from . import fetcher
+from .fnguide_parser import Fundamentals, parse_finance, parse_main
+from .fundamentals_cache import DEFAULT_TTL_DAYS
+from .metrics import collector
+from .shared_cache import SingleFlight, TTLCache
+from .valuation import is_preferred, is_etf
+
+FNGUIDE_URL = os.environ.get('STOCKSCAN_FNGUIDE_URL', 'https://comp.fnguide.com')  # 벤치마크 스텁 서버 등으로 교체 가능
+
+# 서버 전체(모든 접속자) 공유: 최근 수집한 원본 재무 데이터 + 종목별 진행 중인 수집
+fundamentals_memory = TTLCache()
+fundamentals_flight = SingleFlight()
+
+
+# 종목 단위 실패 사유 (제외사유로 표시). 일시적 오류/점검 페이지는 탐색 마지막에 한 번 더 수집 (scan_engine.retry_failed)
+# 파싱 실패는 같은 페이지에서 매번 같은 결과 (예: 재무상태표가 없는 종목) 이므로 다시 요청하지 않음
+ERROR_REASONS = {
+    'timeout': "재무 데이터 로드 오류 (시간 초과)",
+    'connection': "재무 데이터 로드 오류 (연결 실패)",
+    'throttled': "재무 데이터 로드 오류 (요청 제한)",
+    'server': "재무 데이터 로드 오류 (서버 오류)",
+    'http': "재무 데이터 로드 오류",
+    'unavailable': "재무 데이터 로드 오류 (점검/오류 페이지)",
+    'parse': "재무 데이터 파싱 오류",
+}
+RETRY_KINDS = fetcher.FetchError.TRANSIENT | {'unavailable'}
+
+
+def _is_unavailable_page(page_html):
+    # 점검/오류 안내 페이지가 200 으로 온 경우: 표도, FnGuide 의 '정보 없음' 안내 (ETF 등) 도 없음
+    return '<table' not in page_html and 'um_notidata' not in page_html
+
+
+def _fetch_parsed(url, stage, parse):
+    res = fetcher.get(url)
+    res.encoding = 'utf-8'
+    try:
+        with collector.timer(stage): return parse(res.text)
+    except Exception as e:
+        kind = 'unavailable' if _is_unavailable_page(res.text) else 'parse'
+        raise fetcher.FetchError(kind, f"{type(e).__name__}: {e}") from e
+
+
+def fetch_fundamentals(ticker):
+    # FnGuide 재무제표/메인 페이지에서 원본 재무 데이터 추출 → (raw, FetchError)
+    url_fin = f"{FNGUIDE_URL}/SVO2/ASP/SVD_Finance.asp?pGB=1&gicode=A{ticker}"
+    url_main = f"{FNGUIDE_URL}/SVO2/ASP/SVD_Main.asp?pGB=1&gicode=A{ticker}"
+    try:
+        t_equity, t_debt, c_liab = _fetch_parsed(url_fin, 'fnguide.parse_finance', parse_finance)
+        a_eps, past_eps, q_eps, bps, past_bps, op_profit, is_future_eps, period = _fetch_parsed(url_main, 'fnguide.parse_main', parse_main)
+    except fetcher.FetchError as e: return None, e
+    return Fundamentals(t_equity, t_debt, c_liab, a_eps, past_eps, q_eps, bps, past_bps, op_profit, is_future_eps, period)._asdict(), None
+
+
+@collector.timed('analyze_stock')
+def analyze_stock(ticker, name, market, current_price, shares, marcap_rank, filters, cache=None, ttl_days=DEFAULT_TTL_DAYS, force_refresh=False):
+    # 종목별 원본 레코드 수집 (적정주가 계산과 필터 판정은 stockscan.valuation 에서 전체 종목 일괄 처리)
+    record = {'Code': ticker, 'Name': name, 'Market': market, 'Marcap_Rank': marcap_rank, 'Close': current_price, 'Stocks': shares,
+              'is_pref': is_preferred(ticker, name), 'is_etf': is_etf(name), 'fetched': False, 'error': None, 'retryable': False}
+    # 우선주/ETF 는 필터가 켜져 있으면 FnGuide 요청 자체를 생략
+    if (record['is_pref'] and filters.get('pref', True)) or (record['is_etf'] and filters.get('etf', True)):
+        return record
+    
+    raw, error = load_fundamentals(ticker, cache, ttl_days, force_refresh)
+    if error:
+        record['error'] = ERROR_REASONS.get(error.kind, ERROR_REASONS['http'])
+        record['retryable'] = error.kind in RETRY_KINDS
+        return record
+    record.update(raw)
+    record['fetched'] = True
+    return record
+
+
+def load_fundamentals(ticker, cache=None, ttl_days=DEFAULT_TTL_DAYS, force_refresh=False):
+    # 메모리 공유 캐시 → 로컬 캐시 → FnGuide 순으로 원본 재무 데이터 조회 → (raw, FetchError)
+    # 같은 종목을 다른 세션이 이미 수집 중이면 새로 요청하지 않고 그 결과를 기다림 (강제 갱신은 강제 갱신끼리만 합침)
+    if not force_refresh:
+        raw = fundamentals_memory.get(ticker, max_age=ttl_days * 86400)
+        if raw is not None: return raw, None
+
+    def load():
+        if cache is None or force_refresh: raw = None
+        else:
+            with collector.timer('cache.get'): raw = cache.get(ticker, ttl_days)
+        if raw is None:
+            with collector.timer('fnguide.fetch'): raw, error = fetch_fundamentals(ticker)
+            if error: return None, error
+            if cache is not None: cache.put(ticker, raw)
+        fundamentals_memory.put(ticker, raw)
+        return raw, None
+
+    t0 = time.perf_counter()
+    (raw, error), shared = fundamentals_flight.do((ticker, bool(force_refresh)), load)
+    if shared: collector.record_stage('fnguide.inflight_wait', time.perf_counter() - t0)
+    return raw, error
+
+
+def analyze_target(stock, filters, cache=None, ttl_days=DEFAULT_TTL_DAYS, force_refresh=False):
+    # 시장 종목 목록의 레코드(dict) 하나를 분석
+    return analyze_stock(stock['Code'], stock['Name'], stock.get('Market', 'KOSPI'), float(stock['Close']), float(stock['Stocks']), stock['Marcap_Rank'], filters,
+                         cache=cache, ttl_days=ttl_days, force_refresh=force_refresh)
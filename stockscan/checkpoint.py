@@ -0,0 +1,165 @@
+import json
+import os
+import re
+import secrets
+import shutil
+import time
+from datetime import datetime
+
+from .fundamentals_cache import CACHE_DIR
+
+SCANS_DIR = os.path.join(CACHE_DIR, 'scans')
+
+
+# --- 탐색 체크포인트 (종목별 원본 레코드를 한 줄씩 JSON 으로 이어 쓰기) ---
+# 매 줄 flush 만 하고 fsync 는 하지 않음: 프로세스가 재시작되어도 OS 버퍼의 내용은 남고, 종목당 비용은 수 μs 수준
+
+def _json_default(o):
+    return o.item() if hasattr(o, 'item') else str(o)
+
+
+def load_records(path):
+    # 체크포인트의 레코드 목록. 쓰다가 끊긴 줄은 무시
+    records = []
+    if not path or not os.path.exists(path): return records
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try: records.append(json.loads(line))
+            except ValueError: continue
+    return records
+
+
+def _truncate_partial_line(path):
+    # 마지막 줄이 줄바꿈 없이 끊겨 있으면 잘라냄 (이어 쓴 레코드가 끊긴 줄에 붙어 함께 손상되지 않도록)
+    if not os.path.exists(path): return
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0: return
+        f.seek(size - 1)
+        if f.read(1) == b'\n': return
+        pos = size
+        while pos > 0:
+            step = min(4096, pos)
+            f.seek(pos - step)
+            chunk = f.read(step)
+            nl = chunk.rfind(b'\n')
+            if nl >= 0:
+                f.truncate(pos - step + nl + 1)
+                return
+            pos -= step
+        f.truncate(0)
+
+
+class CheckpointWriter:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        _truncate_partial_line(path)
+        self._f = open(path, 'a', encoding='utf-8')
+
+    def write(self, record):
+        self._f.write(json.dumps(record, ensure_ascii=False, default=_json_default) + '\n')
+        self._f.flush()
+
+    def write_many(self, records):
+        self._f.write(''.join(json.dumps(r, ensure_ascii=False, default=_json_default) + '\n' for r in records))
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- 탐색 ID 단위 저장소 ---
+# .cache/scans/<탐색 ID>/ 아래에 meta.json (생성 시 1회), targets.jsonl (탐색 대상), records.jsonl (분석 결과)
+# 대상/결과 모두 이어 쓰기만 하므로 중간에 끊겨도 마지막 줄 외에는 손상되지 않음
+
+class ScanCheckpoint:
+    def __init__(self, scan_id, scans_dir=None):
+        self.scan_id = scan_id
+        self.dir = os.path.join(scans_dir or SCANS_DIR, scan_id)
+        self.meta_path = os.path.join(self.dir, 'meta.json')
+        self.targets_path = os.path.join(self.dir, 'targets.jsonl')
+        self.records_path = os.path.join(self.dir, 'records.jsonl')
+
+    @classmethod
+    def create(cls, targets, label='', settings=None, scans_dir=None):
+        scan_id = f"{datetime.now():%Y%m%d-%H%M%S}-{secrets.token_hex(2)}"
+        ckpt = cls(scan_id, scans_dir)
+        os.makedirs(ckpt.dir, exist_ok=True)
+        meta = {'scan_id': scan_id, 'created_at': time.time(), 'label': label, 'settings': settings or {}}
+        with open(ckpt.meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, default=_json_default)
+        ckpt.add_targets(targets)
+        return ckpt
+
+    def exists(self):
+        return os.path.exists(self.meta_path)
+
+    def add_targets(self, targets):
+        # 이어서/추가 탐색으로 늘어난 대상만 뒤에 덧붙임
+        if not targets: return
+        with CheckpointWriter(self.targets_path) as w: w.write_many(targets)
+
+    def writer(self):
+        return CheckpointWriter(self.records_path)
+
+    def meta(self):
+        with open(self.meta_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self):
+        # (meta, 탐색 대상, 분석 레코드) → 대상은 완료된 종목을 앞으로 모아서 반환하므로 len(레코드) 가 재개 위치
+        targets = _unique(load_records(self.targets_path))
+        records = _unique(load_records(self.records_path))
+        done = {r['Code'] for r in records}
+        targets = [t for t in targets if t['Code'] in done] + [t for t in targets if t['Code'] not in done]
+        order = {t['Code']: i for i, t in enumerate(targets)}
+        records = sorted((r for r in records if r['Code'] in order), key=lambda r: order[r['Code']])
+        return self.meta(), targets, records
+
+    def delete(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def _unique(rows):
+    # 같은 종목이 여러 번 기록된 경우 (중단 직후 재개, 탐색 마지막의 재시도 등) 위치는 처음, 내용은 마지막 기록 사용
+    out = {}
+    for r in rows: out[r['Code']] = r
+    return list(out.values())
+
+
+_RE_CODE = re.compile(rb'"Code": "([^"]*)"')
+
+
+def _count_codes(path):
+    # 종목코드 수 (중복 기록 제외, 끊긴 마지막 줄 제외). JSON 전체를 읽지 않고 Code 값만 찾음
+    if not os.path.exists(path): return 0
+    codes = set()
+    with open(path, 'rb') as f:
+        for line in f:
+            m = _RE_CODE.search(line)
+            if m and line.endswith(b'\n'): codes.add(m.group(1))
+    return len(codes)
+
+
+def list_scans(scans_dir=None, limit=None):
+    # 최근 수정 순 탐색 목록 (대상/완료 종목 수는 종목코드만 훑어서 빠르게 계산)
+    root = scans_dir or SCANS_DIR
+    if not os.path.isdir(root): return []
+    out = []
+    for scan_id in os.listdir(root):
+        ckpt = ScanCheckpoint(scan_id, root)
+        if not ckpt.exists(): continue
+        try: meta = ckpt.meta()
+        except ValueError: continue
+        paths = [ckpt.meta_path, ckpt.targets_path, ckpt.records_path]
+        out.append({'scan_id': scan_id, 'label': meta.get('label', ''), 'created_at': meta.get('created_at'),
+                    'updated_at': max(os.path.getmtime(p) for p in paths if os.path.exists(p)),
+                    'targets': _count_codes(ckpt.targets_path), 'done': _count_codes(ckpt.records_path)})
+    out.sort(key=lambda s: s['updated_at'], reverse=True)
+    return out[:limit] if limit else out
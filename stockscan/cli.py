@@ -0,0 +1,137 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+from . import listing
+from .analysis import analyze_target
+from .checkpoint import CheckpointWriter, load_records
+from .fundamentals_cache import default_cache, DEFAULT_TTL_DAYS
+from .history_store import HISTORY_DIR, append_scan
+from .metrics import collector, reason_summary
+from .render import rank_results
+from .scan_engine import run_scan, retry_failed, DEFAULT_WORKERS, MAX_WORKERS
+from .valuation import DEFAULT_FILTERS, evaluate, parse_multiples, reprice
+
+# --- 명령행 일괄 탐색 (Streamlit 없이 실행) ---
+# 예) python -m stockscan --market KOSPI --out kospi.parquet --skipped-out kospi_skip.csv --checkpoint .cache/kospi.jsonl
+
+FILTER_HELP = {
+    'pref': "우선주", 'etf': "ETF 종목", 'eps_neg': "적자기업 (EPS 음수)", 'op_neg': "영업이익 적자",
+    'target_neg': "목표주가 음수", 'intrinsic_neg': "적정주가 음수", 'eps10_bps': "EPS*10 < BPS",
+}
+
+
+def build_parser():
+    p = argparse.ArgumentParser(prog='stockscan', description="주식탐색기 일괄 탐색: 결과/제외 종목을 CSV 또는 Parquet 으로 저장")
+    mode = p.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--market', choices=['KOSPI', 'KOSDAQ'], help="시장 전체 탐색 (--top 과 함께 쓰면 상위 N개)")
+    mode.add_argument('--tickers', help="사용자 지정 탐색: 쉼표로 구분한 종목코드")
+    mode.add_argument('--names', help="사용자 지정 탐색: 쉼표로 구분한 종목명")
+    p.add_argument('--top', type=int, help="시가총액 상위 N개만 탐색 (--market 과 함께)")
+    for key, label in FILTER_HELP.items():
+        p.add_argument(f"--filter-{key.replace('_', '-')}", dest=f'filter_{key}', action=argparse.BooleanOptionalAction,
+                       default=DEFAULT_FILTERS[key], help=f"{label} 제외 (기본: 제외)")
+    p.add_argument('--multiples', default='10, 15', help="PER 배수 (쉼표 구분, 첫 번째 배수로 정렬)")
+    p.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help=f"동시 분석 종목 수 (최대 {MAX_WORKERS})")
+    p.add_argument('--cache-ttl-days', type=int, default=DEFAULT_TTL_DAYS, help="재무 데이터 캐시 유효기간 (일)")
+    p.add_argument('--force-refresh', action='store_true', help="재무 데이터 캐시 무시하고 새로 수집")
+    p.add_argument('--no-cache', action='store_true', help="재무 데이터 캐시 사용 안 함")
+    p.add_argument('--checkpoint', help="종목별 진행 상황을 기록할 파일 (이미 있으면 이어서 탐색)")
+    p.add_argument('--out', required=True, help="탐색 결과 파일 (.csv 또는 .parquet)")
+    p.add_argument('--skipped-out', help="제외 종목 파일 (.csv 또는 .parquet)")
+    p.add_argument('--metrics-out', help="요청 지연/단계별 소요 시간/제외사유 비율 요약 (.json)")
+    p.add_argument('--history', action='store_true', help=f"탐색 결과를 과거 탐색 기록에 추가 ({HISTORY_DIR})")
+    p.add_argument('--quiet', action='store_true', help="진행 상황 출력 안 함")
+    return p
+
+
+def write_table(df, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if path.endswith('.parquet'): df.to_parquet(path, index=False)
+    else: df.to_csv(path, index=False, encoding='utf-8-sig')
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.top is not None and not args.market: parser.error("--top 은 --market 과 함께만 사용할 수 있습니다 (--tickers/--names 는 지정한 종목 전체를 탐색)")
+    log = (lambda *a: None) if args.quiet else (lambda *a: print(*a, file=sys.stderr, flush=True))
+    filters = {key: getattr(args, f'filter_{key}') for key in FILTER_HELP}
+    multiples = parse_multiples(args.multiples)
+
+    t0 = time.time()
+    market_df = listing.load_market_listing()
+    if market_df.empty:
+        log("시장 종목 목록을 불러오지 못했습니다.")
+        return 1
+    log(f"종목 목록 {len(market_df):,}개 로드 ({time.time() - t0:.1f}초)")
+    if market_df.attrs.get('missing_pages'):
+        log(f"경고: 종목 목록 {market_df.attrs['missing_pages']}페이지를 불러오지 못해 일부 종목과 시가총액 순위가 누락되었습니다.")
+
+    if args.market: targets = listing.select_targets(market_df, args.market, top_n=args.top)
+    elif args.tickers: targets = listing.select_targets(market_df, codes=[c.strip() for c in args.tickers.split(',') if c.strip()])
+    else: targets = listing.select_targets(market_df, names=[n.strip() for n in args.names.split(',') if n.strip()])
+
+    # 체크포인트에 이미 기록된 종목은 다시 요청하지 않음 (같은 종목이 여러 번 기록되어 있으면 마지막 기록)
+    records = list({r['Code']: r for r in load_records(args.checkpoint)}.values())
+    done_codes = {r['Code'] for r in records}
+    pending = [s for s in targets if s['Code'] not in done_codes]
+    log(f"탐색 대상 {len(targets):,}개 (체크포인트 {len(targets) - len(pending):,}개 완료, 남은 종목 {len(pending):,}개)")
+
+    cache = None if args.no_cache else default_cache()
+    def analyze(stock):
+        return analyze_target(stock, filters, cache, args.cache_ttl_days, args.force_refresh)
+
+    writer = CheckpointWriter(args.checkpoint) if args.checkpoint else None
+    t0 = time.time()
+    try:
+        for i, stock, record in run_scan(pending, analyze, max_workers=args.workers):
+            records.append(record)
+            if writer: writer.write(record)
+            if (i + 1) % 50 == 0 or i + 1 == len(pending):
+                rate = (i + 1) / max(time.time() - t0, 1e-9)
+                log(f"진행중: {i + 1:,}/{len(pending):,} ({rate:.1f}종목/초)")
+
+        # 체크포인트에는 이번 대상이 아닌 종목도 있을 수 있으므로 대상 종목만 평가
+        target_codes = {s['Code'] for s in targets}
+        records = [r for r in records if r['Code'] in target_codes]
+        # 재시도 대기열: 일시적 오류/파싱 실패로 누락된 종목 (체크포인트에서 읽은 종목 포함) 을 마지막에 한 번 더 수집
+        queued = sum(1 for r in records if r.get('retryable'))
+        if queued:
+            log(f"누락 종목 {queued:,}개 재시도")
+            for i, record in retry_failed(records, analyze, max_workers=args.workers):
+                records[i] = record
+                if writer: writer.write(record)
+            log(f"누락 종목 {queued - sum(1 for r in records if r.get('retryable')):,}개 복구")
+    finally:
+        if writer: writer.close()
+
+    # 체크포인트에서 읽은 종목도 방금 받은 시세로 현재가를 맞춤 (같은 체크포인트로 다시 실행하면 시세만 갱신)
+    raw_df = reprice(pd.DataFrame(records), market_df)
+    results, skipped = evaluate(raw_df, filters, multiples)
+    if args.history:
+        rows = append_scan(results, skipped, multiples, f"cli-{time.strftime('%Y%m%d-%H%M%S')}")
+        log(f"과거 탐색 기록 {rows:,}종목 추가 → {HISTORY_DIR}")
+    if len(results):
+        results = rank_results(results, multiples)
+        results.insert(0, "순위", results.index + 1)
+    write_table(results, args.out)
+    log(f"탐색 결과 {len(results):,}개 → {args.out}")
+    if args.skipped_out:
+        if len(skipped): skipped = skipped.sort_values("시총순위", kind='stable').reset_index(drop=True)
+        write_table(skipped, args.skipped_out)
+        log(f"제외 종목 {len(skipped):,}개 → {args.skipped_out}")
+    if args.metrics_out:
+        os.makedirs(os.path.dirname(args.metrics_out) or '.', exist_ok=True)
+        with open(args.metrics_out, 'w', encoding='utf-8') as f:
+            json.dump(collector.snapshot(reason_summary(skipped, len(raw_df))), f, ensure_ascii=False, indent=2)
+        log(f"성능 지표 → {args.metrics_out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
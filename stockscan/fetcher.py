@@ -0,0 +1,199 @@
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from .metrics import collector
+
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+# --- 호스트별 요청 한도 (초당 평균 요청 수) ---
+# 고정 sleep 대신 호스트 단위로 요청 속도를 제한하여 FnGuide/Naver 스로틀링을 피함
+# 실제 속도는 AIMD 로 자동 조절: 성공하면 조금씩 올리고 (설정 한도 × RATE_CEILING 까지), 스로틀링 응답(429, Retry-After) 시 절반으로 낮춤
+# 그 외 일시적 오류(Retry-After 없는 503 포함 5xx/시간 초과/연결 끊김)는 재시도만 하고, 최근 요청 중 오류 비율이 높을 때만 감속
+HOST_RATES = {
+    'comp.fnguide.com': 12.0,
+    'finance.naver.com': 20.0,
+}
+DEFAULT_RATE = 5.0
+DEFAULT_BURST = 3
+RATE_CEILING = 1.5     # 오류 없이 유지되면 설정 한도의 1.5배까지 가속
+AIMD_INCREASE = 0.5    # 성공 시 가속 폭 (초당 요청 수가 1초에 약 0.5씩 증가)
+AIMD_DECREASE = 0.5    # 스로틀링 시 감속 배율
+AIMD_COOLDOWN = 2.0    # 감속 후 이 시간(초) 동안은 다시 감속하지 않음 (동시에 실패한 요청들은 1번만 반영)
+MIN_RATE = 0.5
+ERROR_WINDOW = 40      # 오류 비율을 보는 최근 요청 수 (호스트별)
+ERROR_RATE_LIMIT = 0.25  # 최근 요청의 25% 이상이 일시적 오류면 스로틀링과 같이 감속
+
+
+class HostRateLimiter:
+    # 호스트별 토큰 버킷 + AIMD 속도 조절 (프로세스 전체 공유, 스레드 안전)
+    # rates: 호스트별 설정 한도 (0 이면 제한 없음). 바꾸면 다음 요청부터 조절된 속도도 새 한도에서 다시 시작
+    def __init__(self, rates=None, default_rate=DEFAULT_RATE, burst=DEFAULT_BURST, ceiling=RATE_CEILING):
+        self.rates = dict(rates or {})
+        self.default_rate = default_rate
+        self.burst = burst
+        self.ceiling = ceiling
+        self._lock = threading.Lock()
+        self._buckets = {}   # host -> (남은 토큰, 마지막 갱신 시각)
+        self._adaptive = {}  # host -> [설정 한도, 현재 속도, 마지막 감속 시각]
+        self._recent = {}    # host -> 최근 요청 결과 (True: 일시적 오류)
+
+    def _state(self, host):
+        # _lock 안에서 호출. 제한 없는 호스트는 None
+        base = self.rates.get(host, self.default_rate)
+        if not base or base <= 0: return None
+        state = self._adaptive.get(host)
+        if state is None or state[0] != base: state = self._adaptive[host] = [base, base, 0.0]
+        return state
+
+    def current_rate(self, host):
+        with self._lock:
+            state = self._state(host)
+            return state[1] if state else 0.0
+
+    def _record(self, host, failed):
+        # _lock 안에서 호출 → 최근 ERROR_WINDOW 개 요청 중 일시적 오류 비율 (아직 그만큼 요청하지 않았으면 0)
+        recent = self._recent.get(host)
+        if recent is None: recent = self._recent[host] = deque(maxlen=ERROR_WINDOW)
+        recent.append(failed)
+        return sum(recent) / ERROR_WINDOW if len(recent) == ERROR_WINDOW else 0.0
+
+    def on_success(self, host):
+        with self._lock:
+            self._record(host, False)
+            state = self._state(host)
+            if state: state[1] = min(state[0] * self.ceiling, state[1] + AIMD_INCREASE / state[1])
+
+    def on_error(self, host, throttled=False):
+        # 일시적 오류. throttled: 서버가 요청을 줄이라고 알린 경우 (429, Retry-After)
+        with self._lock:
+            error_rate = self._record(host, True)
+            state = self._state(host)
+            now = time.monotonic()
+            if state and (throttled or error_rate >= ERROR_RATE_LIMIT) and now - state[2] >= AIMD_COOLDOWN:
+                state[1], state[2] = max(MIN_RATE, state[1] * AIMD_DECREASE), now
+
+    def rates_frame(self):
+        # 요청한 적 있는 호스트별 (설정 한도, 현재 속도)
+        with self._lock: rows = [(host, base, rate) for host, (base, rate, _) in self._adaptive.items()]
+        return pd.DataFrame(rows, columns=['host', 'limit_per_s', 'current_per_s'])
+
+    def acquire(self, host):
+        while True:
+            with self._lock:
+                state = self._state(host)
+                if state is None: return
+                rate = state[1]
+                now = time.monotonic()
+                tokens, last = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - last) * rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait = (1 - tokens) / rate
+            time.sleep(wait)
+
+
+rate_limiter = HostRateLimiter(HOST_RATES)
+
+
+# --- 공유 HTTP 세션 (keep-alive 커넥션 재사용) ---
+POOL_SIZE = 32
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                s.headers.update(HEADERS)
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+                s.mount('https://', adapter)
+                s.mount('http://', adapter)
+                _session = s
+    return _session
+
+
+# --- 요청 실패 분류 / 재시도 ---
+MAX_RETRIES = 3         # 일시적 오류 재시도 횟수 (첫 요청 제외)
+BACKOFF_BASE = 0.5      # n번째 재시도 전 대기: BACKOFF_BASE * 2^n 초의 절반 + 무작위 (최대 BACKOFF_MAX)
+BACKOFF_MAX = 8.0
+RETRY_AFTER_MAX = 30.0  # 429/503 의 Retry-After 헤더를 따르되 이보다 오래 기다리지 않음
+
+
+class FetchError(Exception):
+    # kind: 'timeout' / 'connection' / 'throttled'(429) / 'server'(5xx) / 'http'(그 외 4xx 등)
+    #       / 'unavailable'(점검/오류 안내 페이지) / 'parse'(응답 형식 오류)
+    TRANSIENT = frozenset({'timeout', 'connection', 'throttled', 'server'})
+
+    def __init__(self, kind, message=None, status=None):
+        super().__init__(message or kind)
+        self.kind = kind
+        self.status = status
+
+    @property
+    def transient(self):
+        return self.kind in self.TRANSIENT
+
+
+def _status_error(status):
+    if status == 429: return FetchError('throttled', "HTTP 429", status)
+    if status >= 500: return FetchError('server', f"HTTP {status}", status)
+    if status >= 400: return FetchError('http', f"HTTP {status}", status)
+    return None
+
+
+def is_throttled(error, res=None):
+    # 서버가 요청 속도를 줄이라고 알린 응답인지 (단발성 5xx/시간 초과는 오류 비율로만 판단)
+    return error.status == 429 or (res is not None and 'Retry-After' in res.headers)
+
+
+def backoff_delay(attempt, res=None):
+    # 지수 백오프 + 지터 (동시에 실패한 요청들이 같은 시각에 다시 몰리지 않도록)
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+    delay = delay / 2 + random.uniform(0, delay / 2)
+    retry_after = res.headers.get('Retry-After') if res is not None else None
+    if retry_after and retry_after.strip().isdigit(): delay = max(delay, min(RETRY_AFTER_MAX, float(retry_after)))
+    return delay
+
+
+def get(url, timeout=5, limiter=rate_limiter, recorder=collector, retries=MAX_RETRIES, **kwargs):
+    # 실패 시 FetchError. 시간 초과/연결 끊김/429/5xx 는 백오프 후 retries 회까지 다시 요청 (호스트 감속은 HostRateLimiter.on_error)
+    # recorder: 시도별 지연(속도 제한 대기 제외)/상태코드/응답 크기/재시도 여부 기록 (None 이면 기록 안 함)
+    host = urlparse(url).hostname
+    for attempt in range(retries + 1):
+        if limiter is not None: limiter.acquire(host)
+        t0 = time.perf_counter()
+        res = None
+        try:
+            res = get_session().get(url, timeout=timeout, **kwargs)
+            error, status, nbytes = _status_error(res.status_code), res.status_code, len(res.content)
+        except requests.Timeout as e:
+            error, status, nbytes = FetchError('timeout', str(e)), type(e).__name__, 0
+        except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+            error, status, nbytes = FetchError('connection', str(e)), type(e).__name__, 0
+        except requests.RequestException as e:
+            error, status, nbytes = FetchError('http', str(e)), type(e).__name__, 0
+        if recorder is not None:
+            raw_retries = getattr(res.raw, 'retries', None) if res is not None else None
+            recorder.record_request(host, time.perf_counter() - t0, status, nbytes,
+                                    int(attempt > 0) + (len(raw_retries.history) if raw_retries else 0))
+        if error is None:
+            if limiter is not None: limiter.on_success(host)
+            return res
+        if not error.transient: raise error
+        if limiter is not None: limiter.on_error(host, is_throttled(error, res))
+        if attempt == retries: raise error
+        wait = backoff_delay(attempt, res)
+        if recorder is not None: recorder.record_stage('fetch.backoff', wait)
+        time.sleep(wait)
@@ -0,0 +1,218 @@
+import re
+from typing import NamedTuple, Optional
+
+from lxml import html as lxml_html
+
+# --- FnGuide SVD_Finance / SVD_Main 전용 추출기 ---
+# pd.read_html 로 페이지의 모든 표를 DataFrame 으로 만들지 않고, 필요한 표/행만 lxml 트리에서 바로 읽음
+# 표 선택, 숨김 요소 제거, colspan/rowspan 확장, 헤더 판정, 결측값 처리는 pd.read_html(lxml) 과 동일하게 맞춤
+
+EOK = 100000000  # 억원 → 원
+
+# pandas 기본 결측값 문자열 (read_html 이 NaN 으로 읽는 셀)
+NA_VALUES = {'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+             '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'}
+
+_RE_WHITESPACE = re.compile(r"[\r\n]+|\s{2,}")
+_RE_PERIOD = re.compile(r'\d{4}/\d{2}')
+_RE_NS = {'re': 'http://exslt.org/regular-expressions'}
+
+
+class Fundamentals(NamedTuple):
+    t_equity: float = 0.0
+    t_debt: float = 0.0
+    c_liab: float = 0.0
+    a_eps: float = 0.0
+    past_eps: float = 0.0
+    q_eps: float = 0.0
+    bps: float = 0.0
+    past_bps: float = 0.0
+    op_profit: float = 0.0
+    is_future_eps: bool = False
+    period: Optional[str] = None  # 최신 분기 실적의 결산월 ('YYYY/MM')
+
+
+def to_float(text):
+    # safe_float(read_html 셀 값) 과 같은 결과
+    if text in NA_VALUES: return None
+    v = text.replace(',', '').strip()
+    if not v or v == '-' or v == 'N/A': return None
+    try: return float(v)
+    except ValueError: return None
+
+
+def _cell_text(td):
+    return _RE_WHITESPACE.sub(' ', td.text_content().strip())
+
+
+def _expand(rows, remainder=None, overflow=True):
+    # <tr> 목록 → 셀 텍스트 행 목록 (rowspan/colspan 복제)
+    out = []
+    remainder = remainder or []
+    for tr in rows:
+        texts, next_rem, index = [], [], 0
+        for td in tr.xpath('./td|./th'):
+            while remainder and remainder[0][0] <= index:
+                prev_i, prev_text, prev_span = remainder.pop(0)
+                texts.append(prev_text)
+                if prev_span > 1: next_rem.append((prev_i, prev_text, prev_span - 1))
+                index += 1
+            text = _cell_text(td)
+            rowspan = int(td.get('rowspan') or 1)
+            colspan = int(td.get('colspan') or 1)
+            for _ in range(colspan):
+                texts.append(text)
+                if rowspan > 1: next_rem.append((index, text, rowspan - 1))
+                index += 1
+        for prev_i, prev_text, prev_span in remainder:
+            texts.append(prev_text)
+            if prev_span > 1: next_rem.append((prev_i, prev_text, prev_span - 1))
+        out.append(texts)
+        remainder = next_rem
+    if not overflow:
+        while remainder:
+            out.append([t for _, t, _ in remainder])
+            remainder = [(i, t, s - 1) for i, t, s in remainder if s > 1]
+    return out, remainder
+
+
+def _split_rows(table):
+    head = []
+    for thead in table.xpath('.//thead'):
+        head.extend(thead.xpath('./tr'))
+        if thead.xpath('./td|./th'): head.append(thead)
+    body = table.xpath('.//tbody//tr') + table.xpath('./tr')
+    foot = table.xpath('.//tfoot//tr')
+    if not head:
+        while body and all(c.tag == 'th' for c in body[0].xpath('./td|./th')):
+            head.append(body.pop(0))
+    return head, body, foot
+
+
+class _Table:
+    # 표 하나를 (헤더 행, 데이터 행) 텍스트로 풀어 둔 것
+    def __init__(self, head_rows, data_rows):
+        self.head = head_rows
+        self.rows = data_rows
+        self.ncols = max(len(r) for r in head_rows + data_rows)
+
+    @property
+    def nlevels(self):
+        return 1 if len(self.head) <= 1 else len(self.head)
+
+    def header_level(self, level):
+        row = self.head[level] + [''] * (self.ncols - len(self.head[level]))
+        return [t if t else f"Unnamed: {j}_level_{level}" for j, t in enumerate(row)]
+
+    def iter_rows(self):
+        for r in self.rows:
+            r = r + [''] * (self.ncols - len(r))
+            label = r[0] if r[0] not in NA_VALUES else 'nan'
+            yield label.replace('\xa0', ' ').replace(' ', '').strip(), r
+
+
+def _parse_table(table):
+    head_tr, body_tr, foot_tr = _split_rows(table)
+    head, rem = _expand(head_tr)
+    body, rem = _expand(body_tr, rem, overflow=len(foot_tr) > 0)
+    foot, _ = _expand(foot_tr, rem, overflow=False)
+    if not head + body + foot or not any(head + body + foot): return None  # 빈 표는 read_html 에서도 제외됨
+    if len(head) > 1:
+        head = [r for r in head if any(r)]
+        if not head: raise ValueError("header rows are all empty")
+    return _Table(head, body + foot)
+
+
+def iter_tables(page_html):
+    # read_html(lxml) 이 반환하는 순서 그대로 표를 하나씩 풀어서 반환 (필요한 만큼만 파싱)
+    doc = lxml_html.document_fromstring(page_html)
+    for br in doc.xpath('*//br'):
+        br.tail = '\n' + (br.tail or '')
+    tables = doc.xpath("//table[.//text()[re:test(., '.+')]]", namespaces=_RE_NS)
+    tables = [t for t in tables if 'display:none' not in t.get('style', '').replace(' ', '')]
+    if not tables: raise ValueError("No tables found")
+    for table in tables:
+        for elem in table.xpath('.//style'): elem.drop_tree()
+        for elem in table.xpath('.//*[@style]'):
+            if 'display:none' in elem.get('style', '').replace(' ', ''): elem.drop_tree()
+        parsed = _parse_table(table)
+        if parsed is not None: yield parsed
+
+
+def _last_value(cells):
+    for t in reversed(cells):
+        v = to_float(t)
+        if v is not None: return v
+    return None
+
+
+def parse_finance(page_html):
+    # SVD_Finance 3번째 표(재무상태표)의 자본/부채/유동부채 최신 값 → (총자본, 총부채, 유동부채) 원 단위
+    tables = iter_tables(page_html)
+    for _ in range(2): next(tables, None)
+    df_bs = next(tables, None)
+    if df_bs is None: raise IndexError("balance sheet table not found")
+    t_equity = t_debt = c_liab = 0.0
+    for nm, cells in df_bs.iter_rows():
+        if nm in ['자본', '자본총계'] and t_equity == 0:
+            v = _last_value(cells)
+            if v is not None: t_equity = v * EOK
+        if nm in ['부채', '부채총계'] and t_debt == 0:
+            v = _last_value(cells)
+            if v is not None: t_debt = v * EOK
+        if '유동부채' in nm and '비유동' not in nm and c_liab == 0:
+            v = _last_value(cells)
+            if v is not None: c_liab = v * EOK
+    return t_equity, t_debt, c_liab
+
+
+def parse_main(page_html):
+    # SVD_Main Financial Highlight 의 EPS/BPS/영업이익 (Annual/Net Quarter, 추정치(E) 구분)
+    a_eps = past_eps = q_eps = bps = past_bps = op_profit = 0.0
+    is_future_eps = False; period = None
+    for tbl in iter_tables(page_html):
+        if tbl.nlevels > 1:
+            col_types = [t.strip() for t in tbl.header_level(0)]
+            col_names = [t.strip() for t in tbl.header_level(1)]
+            is_annual = ['Annual' in t for t in col_types]
+            is_quarter = ['NetQuarter' in t.replace(' ', '') for t in col_types]
+            for nm, cells in tbl.iter_rows():
+                if 'EPS(원)' in nm:
+                    annuals = []
+                    for j in range(len(cells) - 1, 0, -1):
+                        val = to_float(cells[j])
+                        if val is not None:
+                            if is_annual[j]:
+                                annuals.append((val, '(E)' in col_names[j]))
+                            elif is_quarter[j]:
+                                if q_eps == 0: q_eps = val
+                                # 캐시 갱신 판단용 최신 결산 분기: 컨센서스 추정 분기(E)는 제외
+                                if period is None and '(E)' not in col_names[j]:
+                                    m = _RE_PERIOD.search(col_names[j])
+                                    if m: period = m.group(0)
+                    if annuals:
+                        a_eps, is_future_eps = annuals[0]
+                        past_eps = annuals[1][0] if len(annuals) > 1 else a_eps
+                elif 'BPS(원)' in nm and bps == 0:
+                    bps_annuals = []
+                    for j in range(len(cells) - 1, 0, -1):
+                        val = to_float(cells[j])
+                        if val is not None:
+                            if is_annual[j]: bps_annuals.append(val)
+                            if bps == 0 and (is_annual[j] or is_quarter[j]): bps = val
+                    if bps_annuals:
+                        past_bps = bps_annuals[1] if len(bps_annuals) > 1 else bps_annuals[0]
+                elif '영업이익' in nm and op_profit == 0:
+                    for j in range(len(cells) - 1, 0, -1):
+                        val = to_float(cells[j])
+                        if val is not None and is_annual[j]:
+                            op_profit = val
+                            break
+        if a_eps != 0 and q_eps != 0 and bps != 0: break
+    return a_eps, past_eps, q_eps, bps, past_bps, op_profit, is_future_eps, period
+
+
+def parse_fundamentals(fin_html, main_html):
+    t_equity, t_debt, c_liab = parse_finance(fin_html)
+    a_eps, past_eps, q_eps, bps, past_bps, op_profit, is_future_eps, period = parse_main(main_html)
+    return Fundamentals(t_equity, t_debt, c_liab, a_eps, past_eps, q_eps, bps, past_bps, op_profit, is_future_eps, period)
@@ -0,0 +1,81 @@
+import datetime
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_DIR = os.environ.get('STOCKSCAN_CACHE_DIR') or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache')
+DEFAULT_TTL_DAYS = 7
+
+# 종목별로 저장하는 원본 재무 데이터 (가공 전 값)
+FIELDS = ('t_equity', 't_debt', 'c_liab', 'a_eps', 'past_eps', 'q_eps', 'bps', 'past_bps', 'op_profit', 'is_future_eps')
+
+# 분기/반기 보고서는 분기말 후 45일, 사업보고서는 90일 이내 제출
+QUARTER_ENDS = ((3, 31), (6, 30), (9, 30), (12, 31))
+
+
+def expected_period(now=None):
+    # now 시점에 공시 기한이 지나 FnGuide 에 올라와 있어야 하는 최신 결산월 ('YYYY/MM')과 그 공시 기한(timestamp)
+    today = datetime.date.fromtimestamp(now if now is not None else time.time())
+    for year in (today.year, today.year - 1, today.year - 2):
+        for month, day in reversed(QUARTER_ENDS):
+            end = datetime.date(year, month, day)
+            deadline = end + datetime.timedelta(days=90 if month == 12 else 45)
+            if deadline <= today:
+                return f"{year}/{month:02d}", time.mktime(deadline.timetuple())
+    return None, 0.0
+
+
+def needs_refresh(period, fetched_at, ttl_days=DEFAULT_TTL_DAYS, now=None):
+    now = now if now is not None else time.time()
+    if now - fetched_at > ttl_days * 86400: return True
+    # 캐시 이후 새 결산기 공시 기한이 지났는데 저장된 실적이 그 이전 결산기라면 갱신
+    exp_period, deadline = expected_period(now)
+    return bool(period and exp_period and period < exp_period and fetched_at < deadline)
+
+
+class FundamentalsCache:
+    # 종목코드 → 원본 재무 데이터 SQLite 캐시 (작업 스레드에서 공유, 스레드 안전)
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_DIR, 'fundamentals.sqlite')
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            cols = ', '.join(f'{f} REAL' for f in FIELDS)
+            self._conn.execute(f'CREATE TABLE IF NOT EXISTS fundamentals (code TEXT PRIMARY KEY, period TEXT, fetched_at REAL NOT NULL, {cols})')
+
+    def get(self, code, ttl_days=DEFAULT_TTL_DAYS, now=None):
+        with self._lock:
+            row = self._conn.execute(f"SELECT period, fetched_at, {', '.join(FIELDS)} FROM fundamentals WHERE code = ?", (code,)).fetchone()
+        if row is None or needs_refresh(row[0], row[1], ttl_days, now): return None
+        raw = dict(zip(FIELDS, row[2:]))
+        raw['is_future_eps'] = bool(raw['is_future_eps'])
+        raw['period'] = row[0]
+        return raw
+
+    def put(self, code, raw, now=None):
+        values = [code, raw.get('period'), now if now is not None else time.time()] + [float(raw[f]) for f in FIELDS]
+        with self._lock, self._conn:
+            self._conn.execute(f"INSERT OR REPLACE INTO fundamentals (code, period, fetched_at, {', '.join(FIELDS)}) VALUES ({', '.join('?' * len(values))})", values)
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM fundamentals').fetchone()[0]
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM fundamentals')
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None: _default = FundamentalsCache()
+    return _default
@@ -0,0 +1,213 @@
+import os
+import shutil
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from .fundamentals_cache import CACHE_DIR
+from .valuation import fmt_multiple
+
+# --- 탐색 결과 이력 저장소 (Parquet, 탐색월/시장 기준 분할, 이어 쓰기 전용) ---
+# .cache/history/scan_month=YYYY-MM/market=KOSPI/<탐색 ID>-0.parquet
+# 결과표의 한글 컬럼 대신 영문/고정 타입 스키마로 저장하고, 조회는 pyarrow dataset 필터로 분할 디렉터리와
+# row group 통계를 먼저 걸러낸 뒤 필요한 컬럼만 읽음 (종목별 추이 / 특정일 시장 단면)
+# 같은 탐색 ID 를 다시 저장하면 (이어서/추가 탐색 후 재완료) 다른 날/달에 저장된 것까지 그 탐색의 이전 기록을 지우고 새로 씀
+# 조회 비용은 파일 수에 비례하므로, 지난 달 분할은 저장 시 시장별 파일 1개로 합침 (종목코드 순 정렬)
+
+HISTORY_DIR = os.path.join(CACHE_DIR, 'history')
+ROWS_PER_GROUP = 256  # 종목코드 순 정렬 + 작은 row group → 종목 조회 시 통계로 대부분 건너뜀
+
+COMPACT_NAME = 'compact-{i}.parquet'
+
+PARTITION_SCHEMA = pa.schema([('scan_month', pa.string()), ('market', pa.string())])
+FILE_SCHEMA = pa.schema([
+    ('scan_id', pa.string()),
+    ('scan_date', pa.date32()),
+    ('scanned_at', pa.timestamp('s')),
+    ('code', pa.string()),
+    ('name', pa.string()),
+    ('marcap_rank', pa.int32()),
+    ('close', pa.float64()),
+    ('per_multiple', pa.float32()),      # 아래 적정/목표주가, 괴리율 산출에 쓴 첫 번째 PER 배수
+    ('fair_price', pa.float64()),
+    ('target_price', pa.float64()),
+    ('gap_pct', pa.float32()),
+    ('past_fair_price', pa.float64()),
+    ('eps', pa.float64()),
+    ('eps_is_estimate', pa.bool_()),
+    ('bps', pa.float64()),
+    ('debt_ratio', pa.float32()),
+    ('op_profit', pa.float64()),
+    ('shares', pa.float64()),
+    ('excluded_reason', pa.string()),    # 결과표에 포함된 종목은 null
+])
+SCHEMA = pa.schema(list(FILE_SCHEMA) + list(PARTITION_SCHEMA))
+PARTITIONING = ds.partitioning(PARTITION_SCHEMA, flavor='hive')
+
+
+def to_table(results, skipped, multiples, scan_id, scanned_at):
+    # evaluate() 결과 (한글 컬럼) → 이력 스키마 Table
+    frames = [df for df in (results, skipped) if df is not None and len(df)]
+    if not frames: return pa.Table.from_pylist([], schema=SCHEMA)
+    df = pd.concat(frames, ignore_index=True)
+    k = fmt_multiple(multiples[0])
+    out = pd.DataFrame({
+        'scan_id': scan_id,
+        'scan_date': scanned_at.date(),
+        'scanned_at': pd.Timestamp(scanned_at).floor('s'),
+        'code': df["종목코드"].astype(str),
+        'name': df["종목명"].astype(str),
+        'marcap_rank': df["시총순위"],
+        'close': df["현재주가"],
+        'per_multiple': float(multiples[0]),
+        'fair_price': df[f"적정주가({k})"],
+        'target_price': df[f"목표주가({k})"],
+        'gap_pct': df[f"괴리율({k})"],
+        'past_fair_price': df["과거적정주가"],
+        'eps': df["EPS"],
+        'eps_is_estimate': df["추정EPS여부"].astype(bool),
+        'bps': df["BPS"],
+        'debt_ratio': df["부채비율(%)"],
+        'op_profit': df["영업이익"],
+        'shares': df["상장주식수_원"],
+        'excluded_reason': df["제외사유"] if "제외사유" in df else None,
+        'scan_month': scanned_at.strftime('%Y-%m'),
+        'market': df["시장"].astype(str),
+    })
+    table = pa.Table.from_pandas(out, schema=SCHEMA, preserve_index=False)
+    return table.sort_by([('market', 'ascending'), ('code', 'ascending')])
+
+
+def _write(table, root, basename):
+    ds.write_dataset(table, root, format='parquet', partitioning=PARTITIONING,
+                     basename_template=basename, existing_data_behavior='overwrite_or_ignore',
+                     file_options=ds.ParquetFileFormat().make_write_options(compression='zstd'),
+                     min_rows_per_group=ROWS_PER_GROUP, max_rows_per_group=ROWS_PER_GROUP)
+
+
+def _month_files(root, month):
+    # {시장 디렉터리: [parquet 파일]}
+    mdir = os.path.join(root, f'scan_month={month}')
+    if not os.path.isdir(mdir): return {}
+    out = {}
+    for name in os.listdir(mdir):
+        sub = os.path.join(mdir, name)
+        if os.path.isdir(sub): out[sub] = [os.path.join(sub, f) for f in os.listdir(sub) if f.endswith('.parquet')]
+    return out
+
+
+def _latest(df):
+    # 같은 탐색 ID × 종목이 여러 번 있으면 마지막 저장분만 (다른 달에 재저장 / 합치기 중단 시)
+    if df.empty or not {'scan_id', 'market', 'code', 'scanned_at'} <= set(df.columns): return df
+    return df.sort_values('scanned_at', kind='stable').drop_duplicates(['scan_id', 'market', 'code'], keep='last')
+
+
+def compact_month(month, root=None, exclude=None):
+    # 한 달 분할의 탐색별 파일을 시장별 1개로 합침 → 합친 파일 수 (이미 1개씩이면 0)
+    # exclude: 합치면서 뺄 탐색 ID (이미 합친 달에 들어 있는 탐색을 다시 저장할 때)
+    root = root or HISTORY_DIR
+    files = _month_files(root, month)
+    if exclude is None and all(len(v) <= 1 for v in files.values()): return 0
+    df = _latest(dataset(root).to_table(filter=ds.field('scan_month') == month).to_pandas())
+    if exclude is not None: df = df[df['scan_id'] != exclude]
+    df = df.sort_values(['market', 'code', 'scanned_at'], kind='stable')
+    tmp = os.path.join(root, f'.compact-{month}')
+    shutil.rmtree(tmp, ignore_errors=True)
+    _write(pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False), tmp, COMPACT_NAME)
+    # 시장별로 합친 파일을 먼저 옮긴 뒤 기존 파일 삭제 (중간에 멈춰도 조회 시 _latest 로 중복 제거)
+    for sub, old in files.items():
+        new = os.path.join(tmp, f'scan_month={month}', os.path.basename(sub), COMPACT_NAME.format(i=0))
+        target = os.path.join(sub, COMPACT_NAME.format(i=0))
+        moved = os.path.exists(new)  # 없으면 빼고 남은 행이 없는 시장
+        if moved: os.replace(new, target)
+        for f in old:
+            if f != target or not moved: os.remove(f)
+    shutil.rmtree(tmp, ignore_errors=True)
+    return len(files)
+
+
+def remove_scan(scan_id, root=None):
+    # 탐색 하나의 저장된 기록을 모든 분할에서 삭제 (합쳐진 지난 달 파일에 있으면 그 달을 다시 씀)
+    root = root or HISTORY_DIR
+    for month in scan_months(root):
+        for files in _month_files(root, month).values():
+            for f in files:
+                if os.path.basename(f).startswith(f"{scan_id}-"): os.remove(f)
+    d = dataset(root)
+    if d is None: return
+    merged = d.to_table(filter=ds.field('scan_id') == scan_id, columns=['scan_month']).column('scan_month').unique().to_pylist()
+    for month in merged: compact_month(month, root, exclude=scan_id)
+
+
+def append_scan(results, skipped, multiples, scan_id, scanned_at=None, root=None):
+    # 완료된 탐색 1회를 이력에 추가 → 저장한 행 수. 같은 탐색의 이전 기록은 지우고, 지난 달 분할에 파일이 여러 개면 이때 합침
+    root = root or HISTORY_DIR
+    scanned_at = scanned_at or datetime.now()
+    table = to_table(results, skipped, multiples, scan_id, scanned_at)
+    if table.num_rows == 0: return 0
+    remove_scan(scan_id, root)
+    _write(table, root, f"{scan_id}-{{i}}.parquet")
+    current = scanned_at.strftime('%Y-%m')
+    for month in scan_months(root):
+        if month < current: compact_month(month, root)
+    return table.num_rows
+
+
+def dataset(root=None):
+    root = root or HISTORY_DIR
+    if not os.path.isdir(root): return None
+    return ds.dataset(root, schema=SCHEMA, format='parquet', partitioning=PARTITIONING)  # '.' 로 시작하는 합치기 임시 디렉터리는 제외됨
+
+
+def _date_filter(start=None, end=None):
+    # scan_month 조건은 분할 디렉터리 단위로 먼저 걸러내기 위함
+    f = None
+    if start is not None:
+        f = (ds.field('scan_month') >= start.strftime('%Y-%m')) & (ds.field('scan_date') >= pa.scalar(start, pa.date32()))
+    if end is not None:
+        g = (ds.field('scan_month') <= end.strftime('%Y-%m')) & (ds.field('scan_date') <= pa.scalar(end, pa.date32()))
+        f = g if f is None else f & g
+    return f
+
+
+def _query(filt, columns=None, root=None):
+    d = dataset(root)
+    if columns is not None: columns = list(dict.fromkeys(['scan_id', 'scanned_at', 'market', 'code', *columns]))
+    if d is None: return pd.DataFrame(columns=columns or SCHEMA.names)
+    return _latest(d.to_table(filter=filt, columns=columns).to_pandas())
+
+
+def ticker_history(code, start=None, end=None, columns=None, root=None):
+    # 종목 하나의 탐색 시점별 값 (오래된 순)
+    filt = ds.field('code') == code
+    date_filt = _date_filter(start, end)
+    if date_filt is not None: filt = filt & date_filt
+    df = _query(filt, columns, root)
+    return df.sort_values('scanned_at', kind='stable').reset_index(drop=True)
+
+
+def cross_section(scan_date, market=None, columns=None, root=None):
+    # 특정일 시장 단면: 같은 날 여러 번 탐색했으면 종목별 가장 최근 값 (괴리율 높은 순)
+    filt = (ds.field('scan_month') == scan_date.strftime('%Y-%m')) & (ds.field('scan_date') == pa.scalar(scan_date, pa.date32()))
+    if market: filt = filt & (ds.field('market') == market)
+    df = _query(filt, None if columns is None else [*columns, 'gap_pct'], root)
+    if df.empty: return df
+    df = df.sort_values('scanned_at', kind='stable').drop_duplicates(['market', 'code'], keep='last')
+    return df.sort_values('gap_pct', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def scan_months(root=None):
+    # 저장된 탐색월 목록 ('YYYY-MM', 오래된 순, 디렉터리 이름만 확인)
+    root = root or HISTORY_DIR
+    if not os.path.isdir(root): return []
+    return sorted(name.split('=', 1)[1] for name in os.listdir(root) if name.startswith('scan_month='))
+
+
+def scan_dates(root=None):
+    # 저장된 탐색일 목록 (최신순). scan_date 컬럼만 읽음
+    d = dataset(root)
+    if d is None: return []
+    dates = d.to_table(columns=['scan_date']).column('scan_date').unique().to_pylist()
+    return sorted(dates, reverse=True)
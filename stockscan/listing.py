@@ -0,0 +1,113 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from . import fetcher
+from .metrics import collector
+
+# --- 시장(KOSPI/KOSDAQ) 종목 목록 (Naver 시가총액 페이지) ---
+NAVER_URL = os.environ.get('STOCKSCAN_NAVER_URL', 'https://finance.naver.com')  # 벤치마크 스텁 서버 등으로 교체 가능
+MARKETS = [(0, 'KOSPI'), (1, 'KOSDAQ')]
+MAX_LISTING_PAGES = 44  # 마지막 페이지를 알 수 없을 때의 상한
+LISTING_WORKERS = 8
+
+
+def parse_last_page(soup):
+    # 페이지 네비게이션의 '맨뒤'(pgRR) 링크에서 마지막 페이지 번호 추출
+    last = soup.find('td', {'class': 'pgRR'})
+    a_tag = last.find('a') if last else None
+    m = re.search(r'page=(\d+)', a_tag['href']) if a_tag and a_tag.get('href') else None
+    return int(m.group(1)) if m else None
+
+
+@collector.timed('listing.page')
+def fetch_page_data(sosok, page):
+    url = f"{NAVER_URL}/sise/sise_market_sum.naver?sosok={sosok}&page={page}"
+    try:
+        res = fetcher.get(url)
+        with collector.timer('listing.parse'): soup = BeautifulSoup(res.text, 'html.parser')
+        last_page = parse_last_page(soup)
+        table = soup.find('table', {'class': 'type_2'})
+        if not table: return [], False, last_page
+        
+        data = []
+        has_data = False
+        rows = table.find_all('tr')
+        for row in rows:
+            cols = row.find_all('td')
+            if len(cols) > 5:
+                a_tag = cols[1].find('a')
+                if a_tag:
+                    name = a_tag.text.strip()
+                    code = a_tag['href'].split('code=')[-1]
+                    close_txt = cols[2].text.strip().replace(',', '')
+                    stocks_txt = cols[7].text.strip().replace(',', '')
+                    if close_txt and stocks_txt:
+                        data.append({
+                            'Code': code, 'Name': name,
+                            'Close': float(close_txt),
+                            'Stocks': float(stocks_txt) * 1000
+                        })
+                        has_data = True
+        return data, has_data, last_page
+    except (fetcher.FetchError, ValueError, KeyError, AttributeError, IndexError):
+        # 요청 재시도 후에도 실패 / 페이지 형식 오류 → 빈 페이지 (load_market_listing 에서 마지막에 한 번 더 요청)
+        return [], False, None
+
+
+def load_market_listing(on_progress=None, fetch_page=fetch_page_data, workers=LISTING_WORKERS):
+    # 각 시장의 1페이지에서 마지막 페이지를 확인한 뒤, 나머지 페이지를 공유 세션으로 동시에 요청
+    # fetch_page: 페이지 조회 함수 (벤치마크 등에서 교체)
+    # 결과 DataFrame 의 attrs['missing_pages']: 끝까지 받지 못한 페이지 수 (0 이 아니면 일부 종목 누락)
+    pages, last_pages = {}, {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='listing') as ex:
+        first = {sosok: ex.submit(fetch_page, sosok, 1) for sosok, _ in MARKETS}
+        jobs = {}
+        for sosok, fut in first.items():
+            page_data, has_data, last_page = fut.result()
+            if not has_data: page_data, has_data, last_page = fetch_page(sosok, 1)  # 첫 페이지는 실패 시 바로 한 번 더
+            pages[(sosok, 1)] = page_data
+            if not has_data: continue
+            last_pages[sosok] = last_page or 0
+            for page in range(2, (last_page or MAX_LISTING_PAGES) + 1):
+                jobs[ex.submit(fetch_page, sosok, page)] = (sosok, page)
+
+        done, total = len(first), len(first) + len(jobs)
+        if on_progress: on_progress(done, total)
+        for fut in as_completed(jobs):
+            pages[jobs[fut]] = fut.result()[0]
+            done += 1
+            if on_progress: on_progress(done, total)
+
+    # 재시도 대기열: 마지막 페이지 번호 안쪽인데 비어 있는 페이지는 다른 페이지를 다 받은 뒤 한 번 더 요청
+    failed = [(sosok, page) for (sosok, page), rows in pages.items() if not rows and page <= last_pages.get(sosok, 0)]
+    for sosok, page in failed: pages[(sosok, page)] = fetch_page(sosok, page)[0]
+    missing = sum(1 for key in failed if not pages[key]) + sum(1 for sosok, _ in MARKETS if sosok not in last_pages)
+
+    data = []
+    for sosok, market_name in MARKETS:
+        marcap_rank = 1
+        for page in sorted(p for s, p in pages if s == sosok):
+            for item in pages[(sosok, page)]:
+                item['Market'] = market_name
+                item['Marcap_Rank'] = marcap_rank
+                data.append(item)
+                marcap_rank += 1
+    df = pd.DataFrame(data)
+    df.attrs['missing_pages'] = missing
+    return df
+
+
+def select_targets(market_df, market=None, top_n=None, names=None, codes=None):
+    # 탐색 대상 선택: 시장 전체 / 시장 상위 N개 / 사용자 지정(종목명 또는 종목코드)
+    if names is not None or codes is not None:
+        mask = pd.Series(False, index=market_df.index)
+        if names is not None: mask |= market_df['Name'].isin(names)
+        if codes is not None: mask |= market_df['Code'].isin(codes)
+        return market_df[mask].to_dict('records')
+    df = market_df[market_df['Market'] == market]
+    if top_n is not None: df = df.head(top_n)
+    return df.to_dict('records')
@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+
+import pandas as pd
+
+from . import listing
+from .fundamentals_cache import CACHE_DIR
+
+# --- 서버 전체가 공유하는 시장 종목 목록 스냅샷 ---
+# 프로세스당 1개: 시작 시 마지막 실행에서 저장한 파일을 바로 읽고 (없으면 새로 생성), 이후 백그라운드 스레드가
+# 유효기간이 끝나기 전에 미리 다시 받아 교체함. 새 접속자는 로딩 없이 현재 스냅샷을 그대로 사용
+# 갱신은 동시에 하나만 실행되며, 진행 중일 때 요청한 쪽은 새로 시작하지 않고 그 결과를 기다림
+
+SNAPSHOT_PATH = os.path.join(CACHE_DIR, 'market_snapshot.parquet')
+SNAPSHOT_TTL = 3600       # 스냅샷 유효기간 (초)
+REFRESH_AHEAD = 0.8       # 유효기간의 80% 가 지나면 미리 갱신
+RETRY_DELAY = 30          # 갱신 실패 시 재시도 간격 (초)
+
+
+class MarketSnapshot:
+    def __init__(self, path=SNAPSHOT_PATH, ttl=SNAPSHOT_TTL, loader=listing.load_market_listing):
+        self.path = path
+        self.ttl = ttl
+        self.loader = loader
+        self.df = None
+        self.built_at = None
+        self.progress = (0, 0)  # 진행 중인 갱신의 (완료 페이지, 전체 페이지)
+        self.last_error = None
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def ready(self):
+        return self.df is not None
+
+    def refreshing(self):
+        return self._refresh_lock.locked()
+
+    def age(self):
+        return time.time() - self.built_at if self.built_at else float('inf')
+
+    def get(self):
+        # 현재 스냅샷 (없으면 빈 DataFrame). 갱신 중에도 기존 스냅샷을 그대로 반환
+        return self.df if self.df is not None else pd.DataFrame()
+
+    def load_file(self):
+        # 마지막 실행에서 저장한 스냅샷 (유효기간이 지났어도 우선 사용하고 백그라운드에서 갱신)
+        if not os.path.exists(self.path): return False
+        try: df = pd.read_parquet(self.path)
+        except Exception: return False
+        if df.empty: return False
+        self.df, self.built_at = df, os.path.getmtime(self.path)
+        return True
+
+    def _save(self, df):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, self.path)
+
+    def refresh(self):
+        # 종목 목록을 새로 받아 교체 → 성공 여부. 이미 갱신 중이면 새로 시작하지 않고 끝날 때까지 기다림
+        if not self._refresh_lock.acquire(blocking=False):
+            with self._refresh_lock: return self.last_error is None
+        try:
+            self.progress = (0, 0)
+            df = self.loader(lambda done, total: setattr(self, 'progress', (done, total)))
+            if df.empty:
+                self.last_error = "시장 종목 목록을 불러오지 못했습니다."
+                return False
+            missing = df.attrs.get('missing_pages', 0)
+            if missing:
+                # 일부 페이지 누락 (시가총액 순위가 밀림): 기존 스냅샷이 있으면 유지하고 RETRY_DELAY 후 재시도
+                self.last_error = f"시장 종목 목록 일부({missing}페이지)를 불러오지 못했습니다."
+                if self.df is not None: return False
+                # 처음 생성이면 우선 사용 (파일로 저장하지 않음, last_error 가 남아 있으므로 백그라운드에서 곧 다시 갱신)
+                self.df, self.built_at = df, time.time()
+                return True
+            self.df, self.built_at, self.last_error = df, time.time(), None
+            try: self._save(df)
+            except OSError: pass  # 저장 실패해도 메모리 스냅샷은 사용
+            return True
+        except Exception as e:
+            self.last_error = str(e) or type(e).__name__
+            return False
+        finally:
+            self._refresh_lock.release()
+
+    def start_background(self):
+        # 백그라운드 갱신 스레드 시작 (여러 번 호출해도 1개만 실행)
+        if self._thread is not None and self._thread.is_alive(): return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='market-snapshot', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            wait = self.ttl * REFRESH_AHEAD - self.age()
+            if wait > 0 and not self.last_error:
+                self._stop.wait(wait)
+                continue
+            # 실패했거나 일부 페이지가 누락된 경우 RETRY_DELAY 간격으로 다시 시도
+            if not self.refresh() or self.last_error: self._stop.wait(RETRY_DELAY)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_snapshot():
+    # 프로세스 공유 스냅샷: 첫 호출 시 저장된 파일을 읽고 백그라운드 갱신 시작 (파일이 없으면 즉시 생성 시작)
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                snap = MarketSnapshot()
+                snap.load_file()
+                snap.start_background()
+                _default = snap
+    return _default
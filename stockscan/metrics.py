@@ -0,0 +1,153 @@
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+# --- 단계별 소요 시간 / 요청 지표 수집 (프로세스 전체 공유, 스레드 안전) ---
+# 최근 WINDOW 개 표본만 유지하는 롤링 방식이라 장시간 실행해도 메모리가 늘지 않음
+# 요청: 호스트별 지연/상태코드/응답 크기/재시도 횟수, 단계: 목록 페이지/재무 파싱/일괄 평가/결과표 갱신 등의 소요 시간
+
+WINDOW = 5000
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)  # 히스토그램 구간 경계 (마지막 구간은 초과분)
+STOCK_STAGE = 'analyze_stock'  # 처리량(종목/분) 계산 기준 단계
+
+
+def histogram(values_ms, edges=LATENCY_BUCKETS_MS):
+    # 구간별 표본 수 {'<=10ms': n, ..., '>5000ms': n}
+    counts = np.bincount(np.searchsorted(edges, values_ms, side='left'), minlength=len(edges) + 1)
+    labels = [f"<={e}ms" for e in edges] + [f">{edges[-1]}ms"]
+    return dict(zip(labels, counts.tolist()))
+
+
+def _records(df):
+    # numpy 정수/실수를 JSON 기본 타입으로 변환한 레코드 목록
+    return json.loads(df.to_json(orient='records', force_ascii=False))
+
+
+class ScanMetrics:
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = deque(maxlen=self.window)  # (시각, 호스트, 지연 초, 상태, 바이트, 재시도)
+            self.stages = {}                           # 단계 -> deque[(시각, 소요 초)]
+
+    def record_request(self, host, latency, status, nbytes=0, retries=0):
+        # status: HTTP 상태코드, 응답을 받지 못했으면 예외 이름 (예: 'ReadTimeout')
+        with self._lock:
+            self.requests.append((time.time(), host, latency, status, nbytes, retries))
+
+    def record_stage(self, stage, seconds):
+        with self._lock:
+            q = self.stages.get(stage)
+            if q is None: q = self.stages[stage] = deque(maxlen=self.window)
+            q.append((time.time(), seconds))
+
+    @contextmanager
+    def timer(self, stage):
+        t0 = time.perf_counter()
+        try: yield
+        finally: self.record_stage(stage, time.perf_counter() - t0)
+
+    def timed(self, stage):
+        # 함수 전체 소요 시간을 stage 로 기록하는 데코레이터
+        def deco(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage): return fn(*args, **kwargs)
+            return wrapper
+        return deco
+
+    def requests_frame(self):
+        with self._lock: rows = list(self.requests)
+        df = pd.DataFrame(rows, columns=['time', 'host', 'latency', 'status', 'bytes', 'retries'])
+        df['latency_ms'] = df['latency'].astype(float) * 1000
+        df['ok'] = df['status'].map(lambda s: isinstance(s, int) and s < 400).astype(bool)
+        return df.drop(columns='latency')
+
+    def stages_frame(self):
+        with self._lock: rows = [(stage, t, s) for stage, q in self.stages.items() for t, s in q]
+        df = pd.DataFrame(rows, columns=['stage', 'time', 'seconds'])
+        df['ms'] = df['seconds'].astype(float) * 1000
+        return df
+
+    def host_summary(self):
+        # 호스트별 요청 수, p50/p95 지연, 오류율, 평균 응답 크기, 재시도 합계
+        df = self.requests_frame()
+        cols = ['host', 'requests', 'p50_ms', 'p95_ms', 'max_ms', 'error_rate', 'avg_kb', 'retries']
+        if df.empty: return pd.DataFrame(columns=cols)
+        g = df.groupby('host')
+        out = pd.DataFrame({
+            'requests': g.size(), 'p50_ms': g['latency_ms'].quantile(0.5), 'p95_ms': g['latency_ms'].quantile(0.95),
+            'max_ms': g['latency_ms'].max(), 'error_rate': 1 - g['ok'].mean(), 'avg_kb': g['bytes'].mean() / 1024, 'retries': g['retries'].sum(),
+        })
+        return out.reset_index()[cols]
+
+    def status_summary(self):
+        # 호스트 × 상태(코드/예외) 별 요청 수
+        df = self.requests_frame()
+        if df.empty: return pd.DataFrame(columns=['host', 'status', 'requests'])
+        df['status'] = df['status'].astype(str)
+        return df.groupby(['host', 'status']).size().rename('requests').reset_index()
+
+    def stage_summary(self):
+        # 단계별 횟수, 합계/평균/p50/p95 소요 시간
+        df = self.stages_frame()
+        cols = ['stage', 'count', 'total_s', 'mean_ms', 'p50_ms', 'p95_ms']
+        if df.empty: return pd.DataFrame(columns=cols)
+        g = df.groupby('stage', sort=False)
+        out = pd.DataFrame({'count': g.size(), 'total_s': g['seconds'].sum(), 'mean_ms': g['ms'].mean(),
+                            'p50_ms': g['ms'].quantile(0.5), 'p95_ms': g['ms'].quantile(0.95)})
+        return out.reset_index()[cols]
+
+    def throughput(self, stage=STOCK_STAGE):
+        # 롤링 구간 안에서 stage 완료 횟수 / 경과 시간 → 분당 처리 수
+        with self._lock:
+            times = [t for t, _ in self.stages.get(stage, ())]
+        if len(times) < 2: return 0.0
+        span = max(times) - min(times)
+        return (len(times) - 1) / span * 60 if span > 0 else 0.0
+
+    def snapshot(self, reasons=None):
+        # JSON 다운로드용 전체 요약 (reasons: reason_summary 결과)
+        req = self.requests_frame()
+        hist = {host: histogram(g['latency_ms'].to_numpy()) for host, g in req.groupby('host')} if len(req) else {}
+        return {
+            'generated_at': time.time(),
+            'window': self.window,
+            'stocks_per_min': self.throughput(),
+            'hosts': _records(self.host_summary()),
+            'statuses': _records(self.status_summary()),
+            'latency_histogram_ms': hist,
+            'stages': _records(self.stage_summary()),
+            'reasons': [] if reasons is None else _records(reasons),
+        }
+
+    def summary_frame(self, reasons=None):
+        # CSV 다운로드용: 호스트/단계/제외사유 요약을 (구분, 항목, 지표, 값) 세로 형식으로 합침
+        parts = [('host', self.host_summary(), 'host'), ('stage', self.stage_summary(), 'stage')]
+        if reasons is not None: parts.append(('reason', reasons, 'reason'))
+        frames = [df.melt(id_vars=key, var_name='metric').rename(columns={key: 'key'}).assign(section=section)
+                  for section, df, key in parts if len(df)]
+        out = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['key', 'metric', 'value', 'section'])
+        return pd.concat([pd.DataFrame([{'section': 'scan', 'key': 'all', 'metric': 'stocks_per_min', 'value': self.throughput()}]),
+                          out[['section', 'key', 'metric', 'value']]], ignore_index=True)
+
+
+def reason_summary(skipped, total):
+    # 제외사유별 종목 수와 전체 처리 종목 대비 비율
+    cols = ['reason', 'stocks', 'rate']
+    if total == 0 or skipped is None or len(skipped) == 0: return pd.DataFrame(columns=cols)
+    counts = skipped['제외사유'].value_counts()
+    return pd.DataFrame({'reason': counts.index, 'stocks': counts.to_numpy(), 'rate': counts.to_numpy() / total})[cols]
+
+
+collector = ScanMetrics()
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+from .valuation import fmt_multiple
+
+# --- 탐색 결과표 / 제외 종목표 생성 (Streamlit 비의존) ---
+# 셀 단위 apply 대신 같은 서식의 컬럼 묶음을 한 번에 포맷하고, 스타일도 컬럼 그룹 단위로 한 번에 계산
+
+BASE_BG = ('background-color: rgba(128, 128, 128, 0.05); ', 'background-color: transparent; ')
+GROUP1_BG = ('background-color: rgba(60, 130, 250, 0.12); ', 'background-color: rgba(60, 130, 250, 0.05); ')
+GROUP2_BG = ('background-color: rgba(250, 130, 60, 0.12); ', 'background-color: rgba(250, 130, 60, 0.05); ')
+BORDER_LEFT = 'border-left: 2px solid rgba(128,128,128,0.2); '
+BORDER_RIGHT = 'border-right: 2px solid rgba(128,128,128,0.2); '
+FUTURE_TEXT = 'color: #cda8ff; font-weight: bold; '
+
+
+def rank_results(results, multiples):
+    # 첫 번째 배수의 괴리율 높은 순 정렬 (순위 = index + 1)
+    return results.sort_values(f"괴리율({fmt_multiple(multiples[0])})", ascending=False).reset_index(drop=True)
+
+
+def result_columns(multiples):
+    # (표시 컬럼명, 원본 컬럼명, 서식, 단위) 목록
+    keys = [fmt_multiple(m) for m in multiples]
+    cols = [("현재주가(원)", "현재주가", ',.0f', 1)]
+    for k in keys:
+        cols += [(f"적정주가({k}, 원)", f"적정주가({k})", ',.0f', 1), (f"목표주가({k}, 원)", f"목표주가({k})", ',.0f', 1)]
+        if k == keys[0]: cols.append((f"괴리율({k}, %)", f"괴리율({k})", '.2f', 1))
+    cols += [("EPS(원)", "EPS", ',.0f', 1), ("BPS(원)", "BPS", ',.0f', 1), ("과거 적정주가", "과거적정주가", ',.0f', 1)]
+    cols += [(f"과거목표주가({k})", f"과거목표주가({k})", ',.0f', 1) for k in keys]
+    cols += [("과거 EPS(원)", "과거EPS", ',.0f', 1), ("과거 BPS(원)", "과거BPS", ',.0f', 1), ("부채비율(%)", "부채비율(%)", '.2f', 1),
+             ("총부채(억원)", "총부채_원", ',.1f', 1e8), ("유동부채(억원)", "유동부채_원", ',.1f', 1e8), ("총자본(억원)", "총자본_원", ',.1f', 1e8),
+             ("주식수(만개)", "상장주식수_원", ',.0f', 1e4)]
+    return cols
+
+
+def format_block(values, spec):
+    # 2차원 숫자 배열을 한 번에 문자열로 포맷
+    fmt = ('{:' + spec + '}').format
+    flat = values.ravel()
+    return np.array([fmt(v) for v in flat.tolist()], dtype=object).reshape(values.shape)
+
+
+def format_columns(df, cols):
+    # 같은 (서식, 단위) 컬럼끼리 묶어서 포맷
+    out = {}
+    groups = {}
+    for disp, src, spec, scale in cols:
+        groups.setdefault((spec, scale), []).append((disp, src))
+    for (spec, scale), members in groups.items():
+        block = df[[src for _, src in members]].to_numpy(dtype=float)
+        if scale != 1: block = block / scale
+        texts = format_block(block, spec)
+        for j, (disp, _) in enumerate(members): out[disp] = texts[:, j]
+    return out
+
+
+def build_result_table(results, multiples):
+    # 탐색 결과 → (표시용 DataFrame, 셀 스타일 배열)
+    df = rank_results(results, multiples)
+    cols = result_columns(multiples)
+    formatted = format_columns(df, cols)
+    res = pd.DataFrame({"시총순위": df["시총순위"].to_numpy(), **{disp: formatted[disp] for disp, _, _, _ in cols}})
+    # 가로 횡스크롤 시 좌측에 고정되도록 인덱스 설정
+    res.index = pd.MultiIndex.from_arrays([df["시장"].to_numpy(), np.arange(1, len(df) + 1), df["종목명"].to_numpy()], names=["시장", "순위", "종목"])
+    future = df["추정EPS여부"].to_numpy(dtype=bool) if "추정EPS여부" in df else np.zeros(len(df), dtype=bool)
+    return res, result_styles(res.columns, future, multiples)
+
+
+def result_styles(columns, future, multiples):
+    # 컬럼별 (짝수행, 홀수행) 스타일을 먼저 정한 뒤 행 방향으로 펼침
+    keys = [fmt_multiple(m) for m in multiples]
+    price_cols = [c for k in keys for c in (f'적정주가({k}, 원)', f'목표주가({k}, 원)')]
+    group1_cols = price_cols + [f'괴리율({keys[0]}, %)', 'EPS(원)', 'BPS(원)']
+    group2_cols = ['과거 적정주가'] + [f'과거목표주가({k})' for k in keys] + ['과거 EPS(원)', '과거 BPS(원)']
+
+    col_styles = []
+    for col in columns:
+        if col in group1_cols:
+            bg = GROUP1_BG
+            extra = (BORDER_LEFT if col == price_cols[0] else '') + (BORDER_RIGHT if col == 'BPS(원)' else '')
+        elif col in group2_cols:
+            bg = GROUP2_BG
+            extra = (BORDER_LEFT if col == '과거 적정주가' else '') + (BORDER_RIGHT if col == '과거 BPS(원)' else '')
+        else:
+            bg, extra = BASE_BG, ''
+        col_styles.append((bg[0] + extra, bg[1] + extra))
+    even_styles = np.array([s[0] for s in col_styles], dtype=object)
+    odd_styles = np.array([s[1] for s in col_styles], dtype=object)
+    purple = np.array([c in price_cols or c == 'EPS(원)' for c in columns])
+
+    n = len(future)
+    is_even = (np.arange(n) % 2 == 0)[:, None]
+    styles = np.where(is_even, even_styles[None, :], odd_styles[None, :])
+    styles = np.where(future[:, None] & purple[None, :], styles + FUTURE_TEXT, styles)
+    return styles
+
+
+def style_result_table(res, styles):
+    return res.style.apply(lambda _: pd.DataFrame(styles, index=res.index, columns=res.columns), axis=None)
+
+
+class SkipTableView:
+    # 제외 종목표: 필터/배수가 그대로면 새로 제외된 종목만 포맷해서 기존 표에 이어 붙임
+    COLUMNS = ["시장", "종목", "시총순위", "사유", "현재주가(원)"]
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.key = None
+        self.codes = set()
+        self.table = pd.DataFrame(columns=self.COLUMNS)
+
+    def update(self, skipped, key):
+        # 필터/배수가 바뀌었거나 목록이 줄었으면 (새 탐색) 처음부터 다시 생성
+        if key != self.key or len(skipped) < len(self.codes):
+            self.reset()
+            self.key = key
+        new = skipped[~skipped["종목코드"].isin(self.codes)]
+        if len(new):
+            rows = pd.DataFrame({
+                "시장": new["시장"].to_numpy(), "종목": new["종목명"].to_numpy(), "시총순위": new["시총순위"].to_numpy(),
+                "사유": new["제외사유"].to_numpy(),
+                "현재주가(원)": format_block(new["현재주가"].to_numpy(dtype=float), ',.0f'),
+            })
+            self.table = pd.concat([self.table, rows], ignore_index=True) if len(self.table) else rows
+            self.table = self.table.sort_values("시총순위", kind='stable').reset_index(drop=True)
+            self.codes.update(new["종목코드"].tolist())
+        return self.table
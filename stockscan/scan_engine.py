@@ -0,0 +1,40 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = 8
+MAX_WORKERS = 16
+
+
+def run_scan(items, worker, max_workers=DEFAULT_WORKERS, start=0):
+    # items 를 max_workers 개 스레드에서 병렬로 처리하고, 결과는 입력 순서대로 (idx, item, result) 로 내보냄
+    # 순서가 보장되므로 호출측은 yield 마다 current_idx = idx + 1 로 일시정지/재개 지점을 기록할 수 있음
+    max_workers = max(1, min(int(max_workers), MAX_WORKERS))
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scan')
+    queue = iter(enumerate(items, start=start))
+    pending = deque()
+
+    def submit_next():
+        nxt = next(queue, None)
+        if nxt is not None:
+            i, item = nxt
+            pending.append((i, item, executor.submit(worker, item)))
+
+    try:
+        # 결과 소비(화면 갱신) 중에도 작업 스레드가 쉬지 않도록 작업자 수의 2배까지 미리 제출
+        for _ in range(max_workers * 2): submit_next()
+        while pending:
+            i, item, fut = pending.popleft()
+            result = fut.result()
+            submit_next()
+            yield i, item, result
+    finally:
+        # 일시정지/재실행으로 중단되면 대기 중인 작업은 버리고 즉시 반환 (current_idx 이후부터 다시 탐색)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def retry_failed(records, worker, max_workers=DEFAULT_WORKERS):
+    # 재시도 대기열: 일시적 오류(시간 초과/요청 제한/서버 오류/점검 페이지)로 retryable 표시된 레코드만 다시 처리
+    # → (records 내 위치, 새 레코드) 를 순서대로. 레코드는 종목 목록과 같은 필드(Code/Name/Close/...)를 가지므로 그대로 worker 에 넘김
+    queue = [(i, r) for i, r in enumerate(records) if r.get('retryable')]
+    for _, (i, _), result in run_scan(queue, lambda item: worker(item[1]), max_workers=max_workers):
+        yield i, result
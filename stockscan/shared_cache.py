@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+
+# --- 접속자(세션) 간 공유: 같은 키 요청 합치기 + 메모리 LRU 캐시 ---
+
+DEFAULT_MAXSIZE = 5000  # KOSPI + KOSDAQ 전체 종목 수보다 넉넉하게
+DEFAULT_TTL = 3600      # 메모리 캐시 유효기간 (초)
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    # 같은 키의 작업이 이미 실행 중이면 새로 실행하지 않고 그 결과를 함께 받음
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        # → (결과, 다른 호출의 결과를 받았는지 여부). fn 의 예외는 기다리던 호출 모두에 그대로 전달
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader: call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None: raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock: self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        with self._lock: return len(self._calls)
+
+
+class TTLCache:
+    # 크기 제한 LRU + 항목별 유효기간 (스레드 안전)
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (저장 시각, 값)
+
+    def get(self, key, max_age=None):
+        # max_age: 호출측 유효기간 (초) 이 메모리 캐시 유효기간보다 짧으면 더 짧은 쪽 적용
+        limit = self.ttl if max_age is None else min(self.ttl, max_age)
+        with self._lock:
+            item = self._data.get(key)
+            if item is None: return None
+            stored_at, value = item
+            if time.time() - stored_at > limit:
+                if time.time() - stored_at > self.ttl: del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize: self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock: self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
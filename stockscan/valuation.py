@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+from .fundamentals_cache import FIELDS
+
+DEFAULT_MULTIPLES = (10, 15)
+DEFAULT_FILTERS = {'pref': True, 'etf': True, 'eps_neg': True, 'op_neg': True, 'target_neg': True, 'intrinsic_neg': True, 'eps10_bps': True}
+
+ETF_KEYWORDS = ['KODEX', 'TIGER', 'KBSTAR', 'KINDEX', 'ARIRANG', 'KOSEF', 'HANARO', 'ACE', 'SOL', 'TIMEFOLIO', 'FOCUS', '마이티', 'TREX', '히어로즈', 'VITA']
+
+# 탐색 중 수집하는 종목별 원본 레코드 컬럼 (시장 정보 + 수집 결과 + 원본 재무 데이터)
+RAW_COLUMNS = ['Code', 'Name', 'Market', 'Marcap_Rank', 'Close', 'Stocks', 'is_pref', 'is_etf', 'fetched', 'error'] + list(FIELDS) + ['period']
+
+
+def is_preferred(code, name):
+    return not str(code).endswith('0') or name.endswith('우') or '우(' in name or '우B' in name
+
+
+def is_etf(name):
+    return any(k in name for k in ETF_KEYWORDS) or name.endswith('ETF')
+
+
+def fmt_multiple(m):
+    return f"{m:g}"
+
+
+def parse_multiples(text):
+    # "10, 15" → (10.0, 15.0), 잘못된 입력이면 기본값
+    out = []
+    for tok in str(text).replace(' ', '').split(','):
+        try: v = float(tok)
+        except ValueError: continue
+        if v > 0 and v not in out: out.append(v)
+    return tuple(out) if out else DEFAULT_MULTIPLES
+
+
+def compute_valuation(raw_df, multiples=DEFAULT_MULTIPLES):
+    # 원본 레코드 전체에 대해 적정주가/목표주가/괴리율/과거 주가를 한 번에 계산
+    m0 = multiples[0]
+    df = raw_df
+    num = {f: pd.to_numeric(df[f], errors='coerce').fillna(0.0).to_numpy(dtype=float) for f in FIELDS if f != 'is_future_eps'}
+    close = df['Close'].to_numpy(dtype=float)
+    shares = df['Stocks'].to_numpy(dtype=float)
+    t_equity, t_debt, a_eps, bps = num['t_equity'], num['t_debt'], num['a_eps'], num['bps']
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d_ratio = np.where(t_equity != 0, t_debt / t_equity * 100, 0.0)
+        pnlty = np.where(d_ratio > 100, (t_debt - t_equity) / shares, 0.0)
+        c_liab_ps = num['c_liab'] / shares
+
+        out = pd.DataFrame({"종목코드": df['Code'].to_numpy(), "시장": df['Market'].to_numpy(), "시총순위": df['Marcap_Rank'].to_numpy(),
+                            "종목명": df['Name'].to_numpy(), "현재주가": close}, index=df.index)
+        for m in multiples:
+            k = fmt_multiple(m)
+            p = a_eps * m + bps - pnlty
+            out[f"적정주가({k})"] = p
+            out[f"목표주가({k})"] = a_eps * m + bps - c_liab_ps
+            out[f"괴리율({k})"] = np.where(p > 0, (p - close) / close * 100, 0.0)
+        out["EPS"] = a_eps
+        out["추정EPS여부"] = df['is_future_eps'].eq(True).to_numpy()
+        out["BPS"] = bps
+        out["과거적정주가"] = num['past_eps'] * m0 + num['past_bps'] - pnlty
+        for m in multiples:
+            out[f"과거목표주가({fmt_multiple(m)})"] = num['past_eps'] * m + num['past_bps'] - c_liab_ps
+        out["과거EPS"] = num['past_eps']
+        out["과거BPS"] = num['past_bps']
+        out["부채비율(%)"] = d_ratio
+        out["총부채_원"] = t_debt
+        out["유동부채_원"] = num['c_liab']
+        out["총자본_원"] = t_equity
+        out["상장주식수_원"] = shares
+        out["영업이익"] = num['op_profit']
+    return out
+
+
+def exclusion_reasons(raw_df, val_df, filters, multiples=DEFAULT_MULTIPLES):
+    # 필터 우선순위대로 종목별 제외사유 결정 (없으면 None)
+    f = {**DEFAULT_FILTERS, **(filters or {})}
+    k = fmt_multiple(multiples[0])
+    a_eps = val_df["EPS"].to_numpy(); bps = val_df["BPS"].to_numpy()
+    error = raw_df['error'].to_numpy(dtype=object)
+    has_error = pd.notna(error)
+    fetched = raw_df['fetched'].eq(True).to_numpy()
+    missing = (a_eps == 0) | (bps == 0) | (val_df["총자본_원"].to_numpy() == 0)
+    conds = [
+        raw_df['is_pref'].eq(True).to_numpy() & f['pref'],
+        raw_df['is_etf'].eq(True).to_numpy() & f['etf'],
+        has_error,
+        ~fetched,
+        missing,
+        (a_eps <= 0) & f['eps_neg'],
+        (val_df[f"목표주가({k})"].to_numpy() <= 0) & f['target_neg'],
+        (val_df[f"적정주가({k})"].to_numpy() <= 0) & f['intrinsic_neg'],
+        (a_eps * 10 < bps) & f['eps10_bps'],
+        (val_df["영업이익"].to_numpy() < 0) & f['op_neg'],
+    ]
+    choices = ["우선주 제외", "ETF 제외", error, "재무 데이터 미수집", "필요 데이터 누락", "적자 기업 (EPS < 0)",
+               "목표주가 음수", "적정주가 음수", "EPS*10 < BPS", "영업이익 적자"]
+    choices = [np.broadcast_to(np.asarray(c, dtype=object), len(raw_df)) for c in choices]
+    return pd.Series(np.select(conds, choices, default=None), index=raw_df.index, dtype=object)
+
+
+def evaluate(raw_df, filters=None, multiples=DEFAULT_MULTIPLES):
+    # 원본 레코드 → (탐색 결과, 제외 종목) DataFrame. 네트워크 요청 없이 필터/배수 변경 시마다 재계산
+    if raw_df is None or raw_df.empty:
+        return pd.DataFrame(), pd.DataFrame()
+    raw_df = raw_df.reindex(columns=RAW_COLUMNS)
+    val = compute_valuation(raw_df, multiples)
+    reason = exclusion_reasons(raw_df, val, filters, multiples)
+    excluded = reason.notna().to_numpy()
+    results = val[~excluded].reset_index(drop=True)
+    skipped = val[excluded].assign(제외사유=reason[excluded].to_numpy()).reset_index(drop=True)
+    return results, skipped
+
+
+def reprice(raw_df, market_df):
+    # 새로 받은 시세 목록의 현재가/상장주식수/시총순위를 종목코드 기준으로 원본 레코드에 반영 (재무 데이터는 그대로)
+    # 목록에 없는 종목(거래정지 등)은 기존 값 유지 → 이후 evaluate 로 괴리율/순위를 한 번에 재계산
+    if raw_df is None or raw_df.empty or market_df is None or market_df.empty: return raw_df
+    latest = market_df.drop_duplicates('Code').set_index('Code')
+    out = raw_df.copy()
+    for col in ('Close', 'Stocks'):
+        out[col] = out['Code'].map(latest[col]).fillna(out[col]).astype(float)
+    if 'Marcap_Rank' in out and 'Marcap_Rank' in latest:
+        out['Marcap_Rank'] = out['Code'].map(latest['Marcap_Rank']).fillna(out['Marcap_Rank']).astype(out['Marcap_Rank'].dtype)
+    return out